@@ -0,0 +1,193 @@
+import re
+import csv
+import sys
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import parser as manko
+
+CHUNK_SIZE = 16 * 1024 * 1024  # Bytes per pyarrow block
+LINE_DELIMITER = "\x01"  # Never occurs in an export, so pyarrow hands over whole lines
+FIELD_SEPARATOR = "\x1f"
+GROUP_SEPARATOR = "\x1e"
+
+
+def read_lines(file_path, encoding, chunk_size=CHUNK_SIZE):
+    """Yields the lines of a file as pyarrow string arrays, one chunk at a time."""
+    reader = pacsv.open_csv(
+        file_path,
+        read_options=pacsv.ReadOptions(
+            column_names=["line"], block_size=chunk_size,
+            encoding="utf8" if encoding in ("utf-8", "utf-8-sig") else encoding,
+        ),
+        parse_options=pacsv.ParseOptions(
+            delimiter=LINE_DELIMITER, quote_char=False, escape_char=False,
+            newlines_in_values=False, ignore_empty_lines=False,
+        ),
+        convert_options=pacsv.ConvertOptions(column_types={"line": pa.string()}, strings_can_be_null=False),
+    )
+    for batch in reader:
+        yield batch.column(0)
+
+
+def split_fields(lines, delimiter):
+    """
+    Splits lines into list arrays of fields. Lines without quoted fields are
+    split as columns; the few with a field starting with a quote go through the
+    csv module, so quoting rules match the csv.reader path exactly (a quote
+    inside a field is an ordinary character for csv.reader too).
+    """
+    normalized = pc.replace_substring(lines, delimiter, FIELD_SEPARATOR)
+    quoted = pc.match_substring_regex(lines, "(^|" + re.escape(delimiter) + ')"')
+    if pc.any(quoted).as_py():
+        rows = [
+            FIELD_SEPARATOR.join(next(csv.reader([line], delimiter=delimiter), []))
+            for line in pc.filter(lines, quoted).to_pylist()
+        ]
+        normalized = pc.replace_with_mask(normalized, quoted, pa.array(rows, pa.string()))
+    return pc.split_pattern(normalized, FIELD_SEPARATOR)
+
+
+def chunk_items(lines, delimiter, base, state, owners):
+    """
+    Turns one chunk of lines into a table of items with columnar operations.
+
+    base is the file row number of the first line. state is the [row of the last
+    owner header, owner] pair in effect before the chunk and is updated for the
+    next one; detected owners are appended to owners. The rules are the ones of
+    parser.iter_items.
+    """
+    count = len(lines)
+    fields = split_fields(lines, delimiter)
+    first = pc.utf8_trim_whitespace(pc.list_element(fields, 0))
+    rows = pc.add(pc.cumulative_sum(pa.repeat(pa.scalar(1, pa.int64()), count)), base - 1)
+
+    # Owner headers are rare: candidates are found vectorized and accepted in Python,
+    # since a row within two rows of the previous header is never a header
+    carried_header, carried_owner = state
+    last_header = carried_header
+    header_rows = []
+    header_owners = []
+    for position in pc.indices_nonzero(pc.starts_with(pc.utf8_lower(first), manko.OWNER_PREFIX.lower())).to_pylist():
+        if last_header is not None and base + position - last_header <= 2:
+            continue
+        last_header = base + position
+        header_rows.append(last_header)
+        header_owners.append(first[position].as_py().replace(manko.OWNER_PREFIX, "").strip())
+    owners += header_owners
+    if header_rows:
+        state[:] = [header_rows[-1], header_owners[-1]]
+
+    # Forward-fill the row and owner of the last header over every row
+    is_header = pc.is_in(rows, value_set=pa.array(header_rows, pa.int64()))
+    header_row = pc.fill_null_forward(pc.if_else(is_header, rows, pa.scalar(None, pa.int64())))
+    row_owner = pc.fill_null_forward(pc.replace_with_mask(pa.nulls(count, pa.string()), is_header, pa.array(header_owners, pa.string())))
+    if carried_header is not None:
+        header_row = pc.fill_null(header_row, carried_header)
+        row_owner = pc.fill_null(row_owner, carried_owner)
+
+    in_rooms = pc.greater(rows, 0)
+    in_names = pc.fill_null(pc.and_(pc.greater(pc.subtract(rows, header_row), 2), pc.not_equal(row_owner, "")), False)
+    table = pa.table({"fields": fields, "in_rooms": in_rooms, "in_names": in_names, "owner": row_owner})
+    table = table.filter(pc.and_(pc.greater(pc.list_value_length(fields), 5), pc.or_(in_rooms, in_names)))
+
+    fields = table["fields"]
+    location = pc.utf8_trim_whitespace(pc.list_element(fields, 5))
+    keep = pc.and_(pc.invert(pc.match_substring(location, "Lokalita")), pc.match_substring(location, "/"))
+    table = table.filter(keep)
+    fields = table["fields"]
+
+    # "B1 / 2 / 2.21" -> "B1\x1f2\x1f2.21", the stripped main key and sub-keys
+    parts = pc.split_pattern(pc.filter(location, keep), "/").combine_chunks()
+    parts = pa.ListArray.from_arrays(parts.offsets, pc.utf8_trim_whitespace(parts.flatten()))
+    return pa.table({
+        "location": pc.binary_join(parts, FIELD_SEPARATOR),
+        "inventory_number": pc.utf8_trim_whitespace(pc.list_element(fields, 0)),
+        "name": pc.utf8_trim_whitespace(pc.list_element(fields, 1)),
+        "in_rooms": table["in_rooms"],
+        "owner": pc.if_else(table["in_names"], table["owner"], pa.scalar(None, pa.string())),
+    })
+
+
+def read_items(file_path, encoding, delimiter, chunk_size=CHUNK_SIZE):
+    """Returns (items table, detected owners) for a whole file, parsed chunk by chunk."""
+    tables = []
+    owners = []
+    state = [None, None]
+    base = 0
+    for lines in read_lines(file_path, encoding, chunk_size):
+        if base == 0 and len(lines) and lines[0].as_py().startswith("\ufeff"):
+            lines = pa.concat_arrays([pa.array([lines[0].as_py()[1:]], pa.string()), lines.slice(1)])
+        tables.append(chunk_items(lines, delimiter, base, state, owners))
+        base += len(lines)
+    if not tables:
+        return None, owners
+    return pa.concat_tables(tables).combine_chunks(), owners
+
+
+def iter_groups(keys, table):
+    """
+    Yields (key, inventory numbers, names) per distinct key, in first-seen order.
+
+    Groups are formed with dictionary encoding (codes are assigned in order of
+    first appearance), a stable sort on the codes and run-end encoding of the
+    sorted codes, so records keep their file order inside a group, like
+    RecordStore.group.
+    """
+    encoded = pc.dictionary_encode(keys)
+    if isinstance(encoded, pa.ChunkedArray):
+        encoded = encoded.combine_chunks()
+    order = pc.sort_indices(encoded.indices)
+    runs = pc.run_end_encode(encoded.indices.take(order))
+    inventory_numbers = table["inventory_number"].take(order).to_pylist()
+    names = table["name"].take(order).to_pylist()
+    dictionary = encoded.dictionary.to_pylist()
+    start = 0
+    for code, end in zip(runs.values.to_pylist(), runs.run_ends.to_pylist()):
+        yield dictionary[code], inventory_numbers[start:end], names[start:end]
+        start = end
+
+
+def split_key(location):
+    main_key, *sub_keys = location.split(FIELD_SEPARATOR)
+    return main_key, tuple(sub_keys)
+
+
+def iter_items_arrow(file_path, encoding="utf-8", delimiter=";", on_owner=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields the items of a MANKO file in the same per-group order as
+    parser.iter_items_parallel, parsed with pyarrow.
+
+    If pyarrow cannot read the file (e.g. a line containing the control character
+    used to read whole lines), the csv module path is used instead.
+    """
+    try:
+        table, owners = read_items(file_path, encoding, delimiter, chunk_size)
+    except pa.ArrowInvalid as e:
+        print(f"pyarrow could not read '{file_path}' ({e}); using the csv module instead.", file=sys.stderr)
+        with open(file_path, mode="r", encoding=encoding) as csvfile:
+            yield from manko.iter_items(csv.reader(csvfile, delimiter=delimiter), on_owner=on_owner)
+        return
+
+    if on_owner:
+        for owner in owners:
+            on_owner(owner)
+    if table is None:
+        return
+
+    rooms = table.filter(table["in_rooms"])
+    for location, inventory_numbers, names in iter_groups(rooms["location"], rooms):
+        main_key, sub_keys = split_key(location)
+        for inventarni_cislo, nazev in zip(inventory_numbers, names):
+            yield main_key, sub_keys, inventarni_cislo, nazev, True, None
+
+    owned = table.filter(pc.is_valid(table["owner"]))
+    locations = {}
+    owner_keys = pc.binary_join_element_wise(owned["owner"], owned["location"], GROUP_SEPARATOR)
+    for group, inventory_numbers, names in iter_groups(owner_keys, owned):
+        owner, location = group.split(GROUP_SEPARATOR, 1)
+        key = locations.get(location)
+        if key is None:
+            key = locations[location] = split_key(location)
+        for inventarni_cislo, nazev in zip(inventory_numbers, names):
+            yield key[0], key[1], inventarni_cislo, nazev, False, owner
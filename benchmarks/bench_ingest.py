@@ -0,0 +1,62 @@
+"""
+Compares the CSV ingestion engines of parser.py on a synthetic export: the
+csv module serially, the csv module sharded over --jobs processes, and the
+pyarrow engine when pyarrow is installed. Every engine yields the same items;
+only the time to produce all of them is measured. Run from the repository root:
+
+    python benchmarks/bench_ingest.py --rows 1000000 --encoding cp1250
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parser as manko  # noqa: E402
+from synthetic import write_manko  # noqa: E402
+
+
+def consume(file_path, jobs, engine):
+    items = 0
+    for _ in manko.iter_file_items(file_path, jobs, engine=engine):
+        items += 1
+    return items
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parser.py ingestion engines.")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--owners", type=int, default=300)
+    parser.add_argument("--rooms", type=int, default=3000)
+    parser.add_argument("--encoding", default="utf-8")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix="bench_ingest_")
+    try:
+        file_path = os.path.join(work_dir, "MANKO.csv")
+        write_manko(file_path, args.rows, args.owners, args.rooms, encoding=args.encoding)
+        size_mb = os.path.getsize(file_path) / 1024 / 1024
+        encoding, delimiter = manko.detect_format(file_path)
+        print(f"{args.rows} rows, {size_mb:.1f} MiB, detected {encoding} with {delimiter!r}")
+
+        runs = [("csv module", 1, "python"), (f"csv module, {args.jobs} jobs", args.jobs, "python")]
+        if manko.arrow_available():
+            runs.append(("pyarrow", 1, "arrow"))
+        else:
+            print("pyarrow is not installed; skipping the arrow engine")
+
+        for label, jobs, engine in runs:
+            start = time.perf_counter()
+            items = consume(file_path, jobs, engine)
+            elapsed = time.perf_counter() - start
+            print(f"{label:<24} {elapsed:7.2f} s  {args.rows / elapsed:>10,.0f} rows/s  ({items} items)")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
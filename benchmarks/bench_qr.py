@@ -0,0 +1,54 @@
+"""
+Compares the per-code latency of the old render-then-resize path with the
+direct-size renderer used by the viewer. Run from the repository root:
+
+    python benchmarks/bench_qr.py --codes 300 --size 300
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import qrcode  # noqa: E402
+
+from run import generate_qr_image, remove_accents, render_qr_image  # noqa: E402
+
+
+def encode_only(code, size):
+    """Lower bound shared by both paths: building the QR matrix."""
+    qr = qrcode.QRCode(border=4)
+    qr.add_data(code)
+    qr.make(fit=True)
+
+
+def resize_path(code, size):
+    return generate_qr_image(code).resize(size)
+
+
+def time_per_code(func, codes, size):
+    timings = []
+    for code in codes:
+        start = time.perf_counter()
+        func(code, size)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--codes", type=int, default=300)
+    parser.add_argument("--size", type=int, default=300)
+    args = parser.parse_args()
+
+    codes = [remove_accents(f"{index:09d}-Č") for index in range(args.codes)]
+    size = (args.size, args.size)
+    print(f"{args.codes} codes rendered at {args.size}x{args.size} px\n")
+    for label, func in (("encode only", encode_only), ("render + resize", resize_path), ("direct size", render_qr_image)):
+        timings = time_per_code(func, codes, size)
+        print(
+            f"{label:<16} mean {statistics.mean(timings):6.2f} ms"
+            f"  median {statistics.median(timings):6.2f} ms  max {max(timings):6.2f} ms"
+        )
@@ -0,0 +1,79 @@
+"""
+Compares the memory held by the original nested defaultdicts / tuple lists with
+the columnar RecordStore. Run from the repository root:
+
+    python benchmarks/bench_records.py --rows 500000
+"""
+import argparse
+import csv
+import gc
+import os
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parser as manko  # noqa: E402
+from records import RecordStore  # noqa: E402
+from synthetic import write_manko  # noqa: E402
+
+
+def nested_structures(items):
+    """The parser's old location_data / owner_data layout plus the viewer's tuple list."""
+    location_data = defaultdict(lambda: defaultdict(list))
+    owner_data = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
+    evidence_entries = []
+    for main_key, sub_keys, inventarni_cislo, nazev, in_rooms, owner in items:
+        if in_rooms:
+            location_data[main_key][sub_keys].append((inventarni_cislo, nazev))
+        if owner:
+            owner_data[owner][main_key][sub_keys].append((inventarni_cislo, nazev))
+        evidence_entries.append((inventarni_cislo, owner or "", nazev))
+    return location_data, owner_data, evidence_entries
+
+
+def record_store(items):
+    """Groups are computed on demand; walking them here counts their transient memory in the peak."""
+    store = RecordStore()
+    for item in items:
+        store.append(*item)
+    for groups in (store.room_groups(), store.owner_groups()):
+        for _ in groups:
+            pass
+    return store, store.view()
+
+
+def measure(label, build, manko_path):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    with open(manko_path, mode="r", encoding="utf-8") as csvfile:
+        result = build(manko.iter_items(csv.reader(csvfile, delimiter=";")))
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<20} held {held / 2**20:8.1f} MiB  peak {peak / 2**20:8.1f} MiB  build {elapsed:6.2f} s")
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--owners", type=int, default=200)
+    parser.add_argument("--rooms", type=int, default=2000)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_records_")
+    try:
+        manko_path = os.path.join(workdir, "MANKO.csv")
+        write_manko(manko_path, args.rows, args.owners, args.rooms)
+        print(f"{args.rows} rows, {args.owners} owners, {args.rooms} rooms\n")
+        measure("nested defaultdicts", nested_structures, manko_path)
+        measure("RecordStore", record_store, manko_path)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,310 @@
+"""
+Benchmark suite for the parser and viewer hot paths on a synthetic MANKO.csv.
+
+Every case runs in a fresh process, so its peak RSS is its own. The viewer's
+render path is timed headless: the same load_data / remove_accents / QRCache
+calls as InventoryApp.show_qr_code, up to the PhotoImage handoff, without a Tk
+display. Run from the repository root:
+
+    python benchmarks/bench_suite.py --rows 200000 --depth 3 --profile 15 --save baseline.json
+    python benchmarks/bench_suite.py --rows 200000 --depth 3 --compare baseline.json
+
+--compare exits with status 1 when a case got slower than --threshold percent.
+"""
+import argparse
+import contextlib
+import cProfile
+import io
+import json
+import multiprocessing
+import os
+import platform
+import pstats
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+import parser as manko  # noqa: E402
+from item_index import scan_csv_files  # noqa: E402
+from qr_cache import QRCache  # noqa: E402
+from run import generate_qr_image, load_data, remove_accents, render_qr_image  # noqa: E402
+from synthetic import write_manko  # noqa: E402
+
+BASELINE_VERSION = 1
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None where it is not available."""
+    try:
+        # ru_maxrss survives exec on Linux, so a spawned process would report its parent's peak
+        with open("/proc/self/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024  # Bytes on macOS, KiB elsewhere
+
+
+def room_files(rooms_dir):
+    return [entry.path for _, entry in sorted(scan_csv_files(rooms_dir))]
+
+
+def viewer_entries(rooms_dir, limit):
+    """The first limit (room file, index) pairs the viewer would show, room entries included."""
+    entries = []
+    for path in room_files(rooms_dir):
+        room_name, evidence_entries = load_data(path, show_errors=False)
+        entries += [(path, index) for index in range(len(evidence_entries))]
+        if hasattr(evidence_entries, "close"):
+            evidence_entries.close()
+        if len(entries) >= limit:
+            break
+    return entries[:limit]
+
+
+def case_parse(context):
+    """parser.process_and_save into empty room and owner trees."""
+    output_dir = tempfile.mkdtemp(dir=context["work_dir"])
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            manko.process_and_save(
+                context["manko_path"], os.path.join(output_dir, "rooms"), os.path.join(output_dir, "names"),
+                jobs=context["jobs"], incremental=False,
+            )
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return context["rows"]
+
+
+def case_parse_by_rooms(context):
+    """parser.process_and_save_by_rooms into an empty room tree."""
+    output_dir = tempfile.mkdtemp(dir=context["work_dir"])
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            manko.process_and_save_by_rooms(context["manko_path"], os.path.join(output_dir, "rooms"))
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return context["rows"]
+
+
+def case_load_data(context):
+    """run.load_data on every room file, reading every entry."""
+    entries = 0
+    for path in room_files(context["rooms_dir"]):
+        room_name, evidence_entries = load_data(path, show_errors=False)
+        for _ in evidence_entries:
+            entries += 1
+        if hasattr(evidence_entries, "close"):
+            evidence_entries.close()
+    return entries
+
+
+def case_remove_accents(context):
+    """run.remove_accents on every inventory number and name of the room files."""
+    texts = []
+    for path in room_files(context["rooms_dir"]):
+        room_name, evidence_entries = load_data(path, show_errors=False)
+        for code, owner, name in evidence_entries:
+            texts += (code, name)
+        if hasattr(evidence_entries, "close"):
+            evidence_entries.close()
+    for text in texts:
+        remove_accents(text)
+    return len(texts)
+
+
+def case_generate_qr_image(context):
+    """run.generate_qr_image resized to the viewer size, the render path before QRCache."""
+    size = (context["qr_size"], context["qr_size"])
+    for index in range(context["qr_codes"]):
+        generate_qr_image(remove_accents(f"{index:09d}")).resize(size)
+    return context["qr_codes"]
+
+
+def render_viewer_entries(context, cache_dir):
+    """What show_qr_code does per entry, minus the Tk widgets."""
+    qr_cache = QRCache(render_qr_image, cache_dir=cache_dir, namespace="direct")
+    size = (context["qr_size"], context["qr_size"])
+    opened = {}
+    try:
+        for path, index in context["viewer_entries"]:
+            if path not in opened:
+                opened[path] = load_data(path, show_errors=False)
+            room_name, evidence_entries = opened[path]
+            inventarizacni_cislo, owner, name = evidence_entries[index]
+            normalized_code = remove_accents(inventarizacni_cislo)
+            labels = (normalized_code, owner, name, f"{room_name} - {index}/{len(evidence_entries) - 1}")  # noqa: F841
+            qr_cache.get(normalized_code, size).convert("RGB")  # ImageTk.PhotoImage converts 1-bit images too
+    finally:
+        for room_name, evidence_entries in opened.values():
+            if hasattr(evidence_entries, "close"):
+                evidence_entries.close()
+    return len(context["viewer_entries"])
+
+
+def case_viewer_render_cold(context):
+    """The viewer render path with an empty QR cache: every code is rendered."""
+    cache_dir = tempfile.mkdtemp(dir=context["work_dir"])
+    try:
+        return render_viewer_entries(context, cache_dir)
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def case_viewer_render_disk(context):
+    """The viewer render path after a restart: every code comes from the disk cache."""
+    return render_viewer_entries(context, context["qr_cache_dir"])
+
+
+CASES = {
+    "parse": case_parse,
+    "parse_by_rooms": case_parse_by_rooms,
+    "load_data": case_load_data,
+    "remove_accents": case_remove_accents,
+    "generate_qr_image": case_generate_qr_image,
+    "viewer_render_cold": case_viewer_render_cold,
+    "viewer_render_disk": case_viewer_render_disk,
+}
+
+
+def run_case(name, context, profile_lines=0):
+    """Runs one case in the current (fresh) process; returns its measurements."""
+    func = CASES[name]
+    if profile_lines:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        func(context)
+        profiler.disable()
+        stats = pstats.Stats(profiler).stats
+        rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:profile_lines]
+        return [
+            {"function": pstats.func_std_string(function), "calls": calls, "tottime": tottime, "cumtime": cumtime}
+            for function, (primitive_calls, calls, tottime, cumtime, callers) in rows
+        ]
+
+    start = time.perf_counter()
+    items = func(context)
+    elapsed = time.perf_counter() - start
+    return {"seconds": elapsed, "items": items, "items_per_s": items / elapsed if elapsed else None, "peak_rss_mb": peak_rss_mb()}
+
+
+def in_fresh_process(name, context, profile_lines=0):
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(run_case, name, context, profile_lines).result()
+
+
+def measure(name, context, repeat, profile_lines):
+    """Best time of repeat runs, the highest peak RSS and optionally a cProfile breakdown of one more run."""
+    runs = [in_fresh_process(name, context) for _ in range(repeat)]
+    result = min(runs, key=lambda run: run["seconds"])
+    rss = [run["peak_rss_mb"] for run in runs if run["peak_rss_mb"] is not None]
+    result["peak_rss_mb"] = max(rss) if rss else None
+    if profile_lines:
+        result["profile"] = in_fresh_process(name, context, profile_lines)
+    return result
+
+
+def print_result(name, result):
+    rss = f"{result['peak_rss_mb']:8.1f} MiB" if result["peak_rss_mb"] is not None else "       n/a"
+    print(f"{name:<20} {result['seconds']:8.3f} s {result['items_per_s']:>12,.0f} items/s  peak RSS {rss}")
+    for row in result.get("profile", []):
+        print(f"    {row['tottime']:8.3f} s tottime {row['cumtime']:8.3f} s cumtime {row['calls']:>9} calls  {row['function']}")
+
+
+def compare(baseline, results, threshold):
+    """Prints the change of every case against a baseline; returns the names of the regressed cases."""
+    regressions = []
+    print(f"\nCompared with the baseline of {baseline['created']}:")
+    for name, result in results.items():
+        old = baseline["cases"].get(name)
+        if old is None:
+            print(f"{name:<20} not in the baseline")
+            continue
+        change = (result["seconds"] / old["seconds"] - 1) * 100
+        line = f"{name:<20} {old['seconds']:8.3f} s -> {result['seconds']:8.3f} s ({change:+6.1f}%)"
+        if result["peak_rss_mb"] is not None and old.get("peak_rss_mb"):
+            line += f", peak RSS {old['peak_rss_mb']:.1f} -> {result['peak_rss_mb']:.1f} MiB"
+        if change > threshold:
+            line += "  REGRESSION"
+            regressions.append(name)
+        print(line)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--owners", type=int, default=200)
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--depth", type=int, default=2, help="location levels below the building")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes of the parse case")
+    parser.add_argument("--qr-codes", type=int, default=200, help="entries rendered by the QR cases")
+    parser.add_argument("--qr-size", type=int, default=300)
+    parser.add_argument("--cases", nargs="+", choices=list(CASES), default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=1, help="runs per case; the fastest is reported")
+    parser.add_argument("--profile", type=int, default=0, metavar="N", help="show the N functions with the highest own time per case")
+    parser.add_argument("--save", help="write the results to a JSON baseline")
+    parser.add_argument("--compare", help="compare the results with a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=10.0, help="slowdown in percent reported as a regression")
+    args = parser.parse_args()
+
+    config = {key: getattr(args, key) for key in ("rows", "owners", "rooms", "depth", "seed", "jobs", "qr_codes", "qr_size")}
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("config") != config:
+            print(f"Warning: '{args.compare}' was measured with {baseline.get('config')}")
+
+    work_dir = tempfile.mkdtemp(prefix="bench_suite_")
+    try:
+        manko_path = os.path.join(work_dir, "MANKO.csv")
+        write_manko(manko_path, args.rows, args.owners, args.rooms, args.depth, args.seed)
+        rooms_dir = os.path.join(work_dir, "out", "rooms")
+        with contextlib.redirect_stdout(io.StringIO()):
+            manko.process_and_save(manko_path, rooms_dir, os.path.join(work_dir, "out", "names"), incremental=False)
+        context = dict(config, work_dir=work_dir, manko_path=manko_path, rooms_dir=rooms_dir)
+        context["viewer_entries"] = viewer_entries(rooms_dir, args.qr_codes)
+        context["qr_cache_dir"] = os.path.join(work_dir, "qr")
+        render_viewer_entries(context, context["qr_cache_dir"])  # Fills the disk cache of viewer_render_disk
+
+        print(f"{args.rows} rows, {args.owners} owners, {args.rooms} rooms, depth {args.depth}\n")
+        results = {}
+        for name in args.cases:
+            results[name] = measure(name, context, args.repeat, args.profile)
+            print_result(name, results[name])
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.save:
+        with open(args.save, mode="w", encoding="utf-8") as f:
+            json.dump({
+                "version": BASELINE_VERSION,
+                "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "config": config,
+                "cases": results,
+            }, f, indent=2)
+        print(f"\nBaseline saved to '{args.save}'.")
+
+    if baseline is not None and compare(baseline, results, args.threshold):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
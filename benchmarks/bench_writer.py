@@ -0,0 +1,106 @@
+"""
+Compares the per-group writer of the original parser with the pooled GroupWriter.
+
+Syscalls are counted with an audit hook ("open" and "os.mkdir" events), so the
+numbers are the same on every platform. Run from the repository root:
+
+    python benchmarks/bench_writer.py --rows 200000 --owners 300 --rooms 3000
+"""
+import argparse
+import csv
+import os
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import parser as manko  # noqa: E402
+from synthetic import write_manko  # noqa: E402
+
+COUNTED_EVENTS = ("open", "os.mkdir")
+counts = defaultdict(int)
+counting = False
+
+
+def audit_hook(event, args):
+    if counting and event in COUNTED_EVENTS:
+        counts[event] += 1
+
+
+def legacy_split(file_path, rooms_dir, names_dir):
+    """The original two-pass approach: group everything, then open one file per group."""
+    for output_dir, owned in ((rooms_dir, False), (names_dir, True)):
+        groups = defaultdict(list)
+        with open(file_path, mode="r", encoding="utf-8") as csvfile:
+            for main_key, sub_keys, inventarni_cislo, nazev, in_rooms, owner in manko.iter_items(csv.reader(csvfile, delimiter=";")):
+                if owned and owner:
+                    groups[((owner,), main_key, sub_keys)].append([inventarni_cislo, owner, nazev])
+                elif not owned and in_rooms:
+                    groups[((), main_key, sub_keys)].append([inventarni_cislo, "", nazev])
+
+        os.makedirs(output_dir, exist_ok=True)
+        for (folders, main_key, sub_keys), rows in groups.items():
+            main_folder = os.path.join(output_dir, *folders, main_key)
+            os.makedirs(main_folder, exist_ok=True)
+            sub_folder = manko.create_nested_folder_structure(main_folder, sub_keys)
+            with open(os.path.join(sub_folder, f"{sub_keys[-1]}.csv"), mode="w", encoding="utf-8", newline="") as out:
+                writer = csv.writer(out, delimiter=";", quoting=csv.QUOTE_NONE, escapechar='\\')
+                writer.writerow([f"{main_key}/{'/'.join(sub_keys)}", f"Místnost: {main_key}/{'/'.join(sub_keys)}", ""])
+                writer.writerows(rows)
+
+
+def pooled_split(file_path, rooms_dir, names_dir, max_open, max_pending):
+    room_writer = manko.GroupWriter(rooms_dir, max_open=max_open, max_pending=max_pending)
+    owner_writer = manko.GroupWriter(names_dir, max_open=max_open, max_pending=max_pending)
+    with open(file_path, mode="r", encoding="utf-8") as csvfile:
+        for main_key, sub_keys, inventarni_cislo, nazev, in_rooms, owner in manko.iter_items(csv.reader(csvfile, delimiter=";")):
+            if in_rooms:
+                room_writer.write((), main_key, sub_keys, [inventarni_cislo, "", nazev])
+            if owner:
+                owner_writer.write((owner,), main_key, sub_keys, [inventarni_cislo, owner, nazev])
+    room_writer.close()
+    owner_writer.close()
+
+
+def measure(label, func, workdir):
+    global counting
+    output_dir = tempfile.mkdtemp(dir=workdir)
+    counts.clear()
+    counting = True
+    start = time.perf_counter()
+    func(os.path.join(output_dir, "rooms"), os.path.join(output_dir, "names"))
+    elapsed = time.perf_counter() - start
+    counting = False
+    shutil.rmtree(output_dir, ignore_errors=True)
+    print(f"{label:<32} {elapsed:8.3f} s {counts['open']:10d} opens {counts['os.mkdir']:10d} mkdirs")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--owners", type=int, default=200)
+    parser.add_argument("--rooms", type=int, default=2000)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--max-open", type=int, nargs="+", default=[256, 32])
+    parser.add_argument("--max-pending", type=int, nargs="+", default=[100000, 10000])
+    args = parser.parse_args()
+
+    sys.addaudithook(audit_hook)
+    workdir = tempfile.mkdtemp(prefix="bench_writer_")
+    try:
+        manko_path = os.path.join(workdir, "MANKO.csv")
+        write_manko(manko_path, args.rows, args.owners, args.rooms, args.depth)
+        print(f"{args.rows} rows, {args.owners} owners, {args.rooms} rooms, depth {args.depth}\n")
+        measure("before (per group)", lambda rooms, names: legacy_split(manko_path, rooms, names), workdir)
+        for max_open in args.max_open:
+            for max_pending in args.max_pending:
+                measure(
+                    f"after ({max_open} open, {max_pending} rows)",
+                    lambda rooms, names: pooled_split(manko_path, rooms, names, max_open, max_pending),
+                    workdir,
+                )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,106 @@
+"""
+Load test for server.py: keeps --concurrency keep-alive connections busy and
+reports requests per second and latency percentiles. Start the server first,
+then run from the repository root:
+
+    python server.py --port 8080 &
+    python benchmarks/load_test.py --port 8080 --requests 5000 --concurrency 32
+
+The request mix is every room listing plus the QR codes of their items, taken
+from /rooms. --revalidate sends If-None-Match with the ETag of an earlier
+response, which measures the 304 path.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import Counter
+from urllib.parse import quote
+
+
+async def fetch(reader, writer, host, path, etag=None):
+    """Sends one GET over an open connection; returns (status, headers, body)."""
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}"]
+    if etag:
+        lines.append(f"If-None-Match: {etag}")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+    await writer.drain()
+    head = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+    headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    body = await reader.readexactly(int(headers.get("content-length", "0")))
+    return int(head[0].split(" ")[1]), headers, body
+
+
+async def build_paths(host, port, rooms, size):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, _, body = await fetch(reader, writer, host, "/rooms")
+        paths = []
+        for room in json.loads(body)["rooms"][:rooms]:
+            room_path = "/rooms/" + quote(room)
+            paths.append(room_path)
+            _, _, body = await fetch(reader, writer, host, room_path)
+            paths += [f"/qr/{quote(item['code'], safe='')}.png?size={size}" for item in json.loads(body)["items"]]
+        return paths
+    finally:
+        writer.close()
+
+
+async def worker(host, port, paths, count, latencies, statuses, etags):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            path = random.choice(paths)
+            start = time.perf_counter()
+            status, headers, _ = await fetch(reader, writer, host, path, etags.get(path) if etags is not None else None)
+            latencies.append(time.perf_counter() - start)
+            statuses[status] += 1
+            if etags is not None and "etag" in headers:
+                etags[path] = headers["etag"]
+    finally:
+        writer.close()
+
+
+async def run(args):
+    paths = await build_paths(args.host, args.port, args.rooms, args.size)
+    print(f"{len(paths)} distinct paths from {args.rooms} rooms")
+    latencies = []
+    statuses = Counter()
+    etags = {} if args.revalidate else None
+    per_worker = max(1, args.requests // args.concurrency)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(args.host, args.port, paths, per_worker, latencies, statuses, etags)
+        for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"{len(latencies)} requests in {elapsed:.2f} s: {len(latencies) / elapsed:.0f} requests/s")
+    print(f"latency mean {statistics.mean(latencies) * 1000:.2f} ms, p50 {p50 * 1000:.2f} ms, p99 {p99 * 1000:.2f} ms")
+    print("statuses: " + ", ".join(f"{status}: {count}" for status, count in sorted(statuses.items())))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure requests/s and p99 latency of server.py.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--rooms", type=int, default=20, help="rooms whose listings and QR codes are requested")
+    parser.add_argument("--size", type=int, default=300, help="QR code size in pixels")
+    parser.add_argument("--revalidate", action="store_true", help="send If-None-Match with earlier ETags")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    random.seed(args.seed)
+    asyncio.run(run(args))
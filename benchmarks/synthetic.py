@@ -0,0 +1,56 @@
+import argparse
+import random
+
+HEADER = ["Inventární číslo", "Název", "Druh", "Datum zařazení", "Cena", "Lokalita"]
+NAMES = ["Židle kancelářská", "Stůl pracovní", "Skříň policová", "Monitor 24\"", "Počítač", "Tiskárna", "Lampa"]
+FIRST_NAMES = ["Jan", "Petra", "Tomáš", "Eva", "Jiří", "Lucie", "Martin", "Věra"]
+LAST_NAMES = ["Novák", "Dvořáková", "Černý", "Procházková", "Kučera", "Veselá", "Horák", "Němcová"]
+
+
+def write_manko(path, rows=10000, owners=50, rooms=500, depth=2, seed=0, encoding="utf-8"):
+    """
+    Writes a synthetic MANKO.csv export.
+
+    Items are spread over the given number of owner blocks and rooms; every room
+    location has depth levels below its building (e.g. depth=2 gives "B1/2/2.14").
+    """
+    rng = random.Random(seed)
+    locations = []
+    for room in range(rooms):
+        parts = [f"B{room % 7 + 1}"]
+        parts += [f"{rng.randint(1, 9)}" for _ in range(depth - 1)]
+        parts.append(f"{parts[-1]}.{room:02d}")
+        locations.append(" / ".join(parts))
+
+    owner_names = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {owner}" for owner in range(owners)]
+
+    with open(path, mode="w", encoding=encoding, newline="") as csvfile:
+        csvfile.write(";".join(HEADER) + "\n")
+        per_owner = max(1, -(-rows // max(1, owners)))
+        written = 0
+        for owner in owner_names:
+            if written >= rows:
+                break
+            csvfile.write(f"Odpovědná ososba: {owner};;;;;\n")
+            csvfile.write(";".join(HEADER) + "\n")
+            csvfile.write(";;;;;\n")
+            for _ in range(min(per_owner, rows - written)):
+                csvfile.write(
+                    f"{written:09d};{rng.choice(NAMES)} {written % 97};DHM;01.01.2020;"
+                    f"{rng.randint(100, 90000)};{rng.choice(locations)}\n"
+                )
+                written += 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic MANKO.csv export.")
+    parser.add_argument("path", nargs="?", default="MANKO.csv")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--owners", type=int, default=50)
+    parser.add_argument("--rooms", type=int, default=500)
+    parser.add_argument("--depth", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--encoding", default="utf-8", help="e.g. cp1250 for the older accounting exports")
+    args = parser.parse_args()
+    write_manko(args.path, args.rows, args.owners, args.rooms, args.depth, args.seed, args.encoding)
+    print(f"Wrote {args.rows} rows to {args.path}")
@@ -0,0 +1,194 @@
+import os
+import json
+import hashlib
+import argparse
+from collections import defaultdict
+from run import load_data, remove_accents
+
+INDEX_NAME = ".item_index.json"
+MANIFEST_NAME = ".manifest.json"  # Written by parser.py into every output directory
+
+
+def fold_code(code):
+    """Folds an inventory number the way the viewer encodes it into QR codes."""
+    return remove_accents(code.strip())
+
+
+def scan_csv_files(base_dir):
+    """Yields (relative path with "/" separators, DirEntry) for every CSV file below base_dir."""
+    pending = [("", base_dir)]
+    while pending:
+        prefix, folder = pending.pop()
+        try:
+            scanner = os.scandir(folder)
+        except FileNotFoundError:
+            continue
+        with scanner:
+            for entry in scanner:
+                if entry.name.startswith("."):
+                    continue
+                if entry.is_dir():
+                    pending.append((prefix + entry.name + "/", entry.path))
+                elif entry.name.endswith(".csv"):
+                    yield prefix + entry.name, entry
+
+
+class ItemIndex:
+    """
+    Global index from folded Inventarizační číslo to (room file, row, owner).
+
+    Built from parser.py's output: every room file of rooms_dir gives the rows of
+    its items, and the matching owner file of names_dir (names/<owner>/<room>.csv)
+    gives the owner. The index is saved next to the two trees and refreshed
+    incrementally: files whose size and mtime are unchanged are not read again,
+    which, since parser.py only rewrites changed groups, is usually almost all of them.
+    The trees are not even walked while the content of parser.py's manifests in
+    them is unchanged; without a manifest every update walks the tree.
+    """
+
+    def __init__(self, rooms_dir="out/rooms", names_dir="out/names", index_path=None):
+        self.rooms_dir = rooms_dir
+        self.names_dir = names_dir
+        self.index_path = index_path or os.path.join(os.path.dirname(os.path.normpath(rooms_dir)), INDEX_NAME)
+        self.files = {"rooms": {}, "names": {}}  # Tree -> relative path -> {"size", "mtime_ns", "codes", "owner"}
+        self.manifests = {}  # Tree -> {"size", "mtime_ns", "sha1"} of its manifest at the last walk
+        self.rooms_by_code = defaultdict(list)  # Folded code -> [(room path, row)]
+        self.owner_of = {}  # (folded code, room path) -> owner
+        self.load()
+
+    def load(self):
+        try:
+            with open(self.index_path, mode="r", encoding="utf-8") as f:
+                data = json.load(f)
+            files = data["files"]
+        except (FileNotFoundError, ValueError, KeyError):
+            return
+        self.manifests = data.get("manifests", {})
+        for tree in self.files:
+            for relative_path, info in files.get(tree, {}).items():
+                self.add_file(tree, relative_path, info)
+
+    def save(self):
+        with open(self.index_path + ".tmp", mode="w", encoding="utf-8") as f:
+            json.dump({"version": 1, "files": self.files, "manifests": self.manifests}, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(self.index_path + ".tmp", self.index_path)
+
+    def add_file(self, tree, relative_path, info):
+        self.files[tree][relative_path] = info
+        if tree == "rooms":
+            for row, code in enumerate(info["codes"], start=1):
+                self.rooms_by_code[code].append((relative_path, row))
+        else:
+            room_path = relative_path.split("/", 1)[1]
+            for code in info["codes"]:
+                self.owner_of.setdefault((code, room_path), info["owner"])
+
+    def remove_file(self, tree, relative_path):
+        info = self.files[tree].pop(relative_path)
+        if tree == "rooms":
+            for code in set(info["codes"]):
+                locations = [location for location in self.rooms_by_code[code] if location[0] != relative_path]
+                if locations:
+                    self.rooms_by_code[code] = locations
+                else:
+                    del self.rooms_by_code[code]
+        else:
+            room_path = relative_path.split("/", 1)[1]
+            for code in info["codes"]:
+                if self.owner_of.get((code, room_path)) == info["owner"]:
+                    del self.owner_of[(code, room_path)]
+
+    def read_file(self, path, stat):
+        _, entries = load_data(path, show_errors=False)
+        try:
+            codes = [fold_code(code) for code, _, _ in list(entries)[1:]]  # Entry 0 is the room itself
+            owner = entries[1][1] if len(entries) > 1 else ""
+        finally:
+            if hasattr(entries, "close"):
+                entries.close()
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "codes": codes, "owner": owner}
+
+    def manifest_stamp(self, base_dir, known):
+        """
+        Returns {"size", "mtime_ns", "sha1"} of the manifest in base_dir, or None without one.
+
+        parser.py saves its manifests on every run, so the content is hashed
+        whenever the size or mtime differ from the known stamp.
+        """
+        manifest_path = os.path.join(base_dir, MANIFEST_NAME)
+        try:
+            stat = os.stat(manifest_path)
+            if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                return known
+            with open(manifest_path, mode="rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+        except FileNotFoundError:
+            return None
+        return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha1": digest}
+
+    def update(self):
+        """
+        Brings the index in line with the output trees; returns the number of files read and dropped.
+        """
+        read = dropped = 0
+        stamps_changed = False
+        for tree, base_dir in (("rooms", self.rooms_dir), ("names", self.names_dir)):
+            known_stamp = self.manifests.get(tree)
+            stamp = self.manifest_stamp(base_dir, known_stamp)
+            if stamp != known_stamp:
+                stamps_changed = True
+            if stamp is not None and known_stamp is not None and stamp["sha1"] == known_stamp["sha1"]:
+                self.manifests[tree] = stamp
+                continue  # Same groups with the same content as at the last walk
+
+            seen = set()
+            for relative_path, entry in scan_csv_files(base_dir):
+                if tree == "names" and "/" not in relative_path:
+                    continue  # Owner files always sit in an owner folder
+                seen.add(relative_path)
+                stat = entry.stat()
+                known = self.files[tree].get(relative_path)
+                if known and known["size"] == stat.st_size and known["mtime_ns"] == stat.st_mtime_ns:
+                    continue
+                try:
+                    info = self.read_file(entry.path, stat)
+                except Exception as e:
+                    print(f"Skipping '{entry.path}': {e}")
+                    continue
+                if known:
+                    self.remove_file(tree, relative_path)
+                self.add_file(tree, relative_path, info)
+                read += 1
+            for relative_path in self.files[tree].keys() - seen:
+                self.remove_file(tree, relative_path)
+                dropped += 1
+            if stamp is None:
+                self.manifests.pop(tree, None)
+            else:
+                self.manifests[tree] = stamp
+        if read or dropped or stamps_changed:
+            self.save()
+        return read, dropped
+
+    def find(self, code):
+        """Returns [(room file path, row, owner)] for an inventory number, in no particular order."""
+        folded = fold_code(code)
+        return [
+            (os.path.join(self.rooms_dir, *room_path.split("/")), row, self.owner_of.get((folded, room_path), ""))
+            for room_path, row in self.rooms_by_code.get(folded, ())
+        ]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or refresh the inventory number index of parser.py's output.")
+    parser.add_argument("--rooms-dir", default="out/rooms")
+    parser.add_argument("--names-dir", default="out/names")
+    parser.add_argument("code", nargs="?", help="inventory number to look up after refreshing")
+    args = parser.parse_args()
+
+    index = ItemIndex(args.rooms_dir, args.names_dir)
+    read, dropped = index.update()
+    print(f"Indexed {len(index.rooms_by_code)} inventory numbers ({read} files read, {dropped} dropped).")
+    if args.code:
+        for room_file, row, owner in index.find(args.code):
+            print(f"{room_file} row {row}" + (f" ({owner})" if owner else ""))
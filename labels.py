@@ -0,0 +1,251 @@
+import os
+import zlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from PIL import Image, ImageDraw, ImageFont
+from run import load_data, remove_accents, render_qr_image
+
+A4_MM = (210, 297)
+MARGIN_MM = 8
+
+
+def find_room_files(path):
+    """Returns the room CSV files under path (or path itself), in a stable order."""
+    if os.path.isfile(path):
+        return [path]
+    room_files = []
+    for folder, folders, files in os.walk(path):
+        folders[:] = sorted(name for name in folders if not name.startswith("."))
+        room_files += [os.path.join(folder, name) for name in sorted(files) if name.endswith(".csv") and not name.startswith(".")]
+    return room_files
+
+
+def find_trees(path):
+    """
+    Returns (rooms dir, names dir) of the parser.py output a room file or folder
+    belongs to: the nearest enclosing "rooms" folder with a "names" folder next
+    to it. Returns (None, None) outside such a tree.
+    """
+    folder = os.path.abspath(path if os.path.isdir(path) else os.path.dirname(path))
+    while True:
+        names_dir = os.path.join(os.path.dirname(folder), "names")
+        if os.path.basename(folder) == "rooms" and os.path.isdir(names_dir):
+            return folder, names_dir
+        parent = os.path.dirname(folder)
+        if parent == folder:
+            return None, None
+        folder = parent
+
+
+def iter_labels(path, rooms_dir=None, names_dir=None):
+    """
+    Yields (code, owner, name) for every entry of every room file, rooms included.
+
+    Room files from parser.py have an empty owner column, so the owner is looked
+    up by (code, room) in the matching names/<owner>/<room>.csv through the
+    item index (see item_index.py). The trees are found next to path unless
+    rooms_dir and names_dir are given.
+    """
+    if rooms_dir is None:
+        rooms_dir, found_names_dir = find_trees(path)
+        names_dir = names_dir or found_names_dir
+    elif names_dir is None:
+        names_dir = os.path.join(os.path.dirname(os.path.normpath(rooms_dir)), "names")
+    owner_of = {}
+    if rooms_dir is not None:
+        from item_index import ItemIndex  # item_index.py imports run, like this module
+
+        index = ItemIndex(rooms_dir, names_dir)
+        index.update()
+        owner_of = index.owner_of
+
+    for room_file in find_room_files(path):
+        room_path = os.path.relpath(room_file, rooms_dir).replace(os.sep, "/") if rooms_dir else None
+        _, evidence_entries = load_data(room_file, show_errors=False)
+        for inventarizacni_cislo, owner, name in evidence_entries:
+            code = remove_accents(inventarizacni_cislo)
+            yield code, owner or owner_of.get((code, room_path), ""), name
+        if hasattr(evidence_entries, "close"):
+            evidence_entries.close()
+
+
+def iter_pages(labels, per_page):
+    page = []
+    for label in labels:
+        page.append(label)
+        if len(page) == per_page:
+            yield page
+            page = []
+    if page:
+        yield page
+
+
+def load_font(size):
+    for name in ("DejaVuSans.ttf", "arial.ttf", "Arial.ttf"):
+        try:
+            return ImageFont.truetype(name, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size)
+    except TypeError:  # Pillow < 10.1 has no sized default font
+        return ImageFont.load_default()
+
+
+def fit_text(draw, text, font, width):
+    """Shortens text with an ellipsis until it fits into width pixels."""
+    if draw.textlength(text, font=font) <= width:
+        return text
+    while text and draw.textlength(text + "…", font=font) > width:
+        text = text[:-1]
+    return text + "…"
+
+
+def render_page(page, dpi, columns, rows):
+    """Lays one page of labels out on an A4 sheet; runs inside a worker process."""
+    width, height = (round(mm / 25.4 * dpi) for mm in A4_MM)
+    margin = round(MARGIN_MM / 25.4 * dpi)
+    label_width = (width - 2 * margin) // columns
+    label_height = (height - 2 * margin) // rows
+    padding = label_height // 12
+    qr_size = label_height - 2 * padding
+    text_width = label_width - qr_size - 3 * padding
+    code_font = load_font(label_height // 7)
+    text_font = load_font(label_height // 10)
+
+    sheet = Image.new("L", (width, height), 255)
+    draw = ImageDraw.Draw(sheet)
+    for position, (code, owner, name) in enumerate(page):
+        left = margin + (position % columns) * label_width
+        top = margin + (position // columns) * label_height
+        draw.rectangle((left, top, left + label_width - 1, top + label_height - 1), outline=200)
+        sheet.paste(render_qr_image(code, (qr_size, qr_size)), (left + padding, top + padding))
+
+        text_left = left + qr_size + 2 * padding
+        text_top = top + padding
+        lines = [(code, code_font)] + [(text, text_font) for text in (owner, name) if text and text != code]
+        for text, font in lines:
+            draw.text((text_left, text_top), fit_text(draw, text, font, text_width), fill=0, font=font)
+            text_top += round(font.size * 1.4) if hasattr(font, "size") else 14
+    return sheet
+
+
+class PdfWriter:
+    """
+    Streams pages into a PDF file.
+
+    Every page is written as soon as it is added, as a Flate-compressed grayscale
+    image; only the object offsets and page ids are kept, so adding a page costs
+    the same however many pages came before it. The page tree, cross-reference
+    table and trailer are written by close().
+    """
+
+    def __init__(self, path, dpi):
+        self.file = open(path, "wb")
+        self.dpi = dpi
+        self.offsets = {}
+        self.page_ids = []
+        self.next_id = 3  # 1 is the catalog, 2 the page tree
+        self.file.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def write_object(self, object_id, body, stream=None):
+        self.offsets[object_id] = self.file.tell()
+        self.file.write(f"{object_id} 0 obj\n".encode("ascii") + body)
+        if stream is not None:
+            self.file.write(b"\nstream\n" + stream + b"\nendstream")
+        self.file.write(b"\nendobj\n")
+
+    def add_page(self, sheet):
+        image_id, contents_id, page_id = range(self.next_id, self.next_id + 3)
+        self.next_id += 3
+        width, height = (size * 72 / self.dpi for size in sheet.size)
+
+        data = zlib.compress(sheet.convert("L").tobytes(), 6)
+        self.write_object(image_id, (
+            f"<< /Type /XObject /Subtype /Image /Width {sheet.width} /Height {sheet.height} "
+            f"/ColorSpace /DeviceGray /BitsPerComponent 8 /Filter /FlateDecode /Length {len(data)} >>"
+        ).encode("ascii"), data)
+        contents = f"q {width:.2f} 0 0 {height:.2f} 0 0 cm /Im0 Do Q".encode("ascii")
+        self.write_object(contents_id, f"<< /Length {len(contents)} >>".encode("ascii"), contents)
+        self.write_object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width:.2f} {height:.2f}] "
+            f"/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {contents_id} 0 R >>"
+        ).encode("ascii"))
+        self.page_ids.append(page_id)
+
+    def close(self):
+        kids = " ".join(f"{page_id} 0 R" for page_id in self.page_ids)
+        self.write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>".encode("ascii"))
+        self.write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        xref = self.file.tell()
+        self.file.write(f"xref\n0 {self.next_id}\n0000000000 65535 f \n".encode("ascii"))
+        for object_id in range(1, self.next_id):
+            self.file.write(f"{self.offsets[object_id]:010d} 00000 n \n".encode("ascii"))
+        self.file.write(f"trailer\n<< /Size {self.next_id} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
+        self.file.close()
+
+
+def render_sheets(path, dpi, columns, rows, jobs, rooms_dir=None, names_dir=None):
+    """
+    Yields (label count, sheet) for every page in order, rendered in a process pool
+    with at most two pages per worker in flight.
+    """
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        in_flight = []
+        for page in iter_pages(iter_labels(path, rooms_dir, names_dir), columns * rows):
+            in_flight.append((len(page), executor.submit(render_page, page, dpi, columns, rows)))
+            if len(in_flight) < 2 * jobs:
+                continue
+            count, future = in_flight.pop(0)
+            yield count, future.result()
+        for count, future in in_flight:
+            yield count, future.result()
+
+
+def export_labels(path, output, dpi=300, columns=3, rows=8, jobs=None, rooms_dir=None, names_dir=None):
+    """
+    Renders label sheets for a room CSV or a whole out/rooms tree.
+
+    Pages are rendered in a process pool and written to disk as they complete,
+    so memory stays flat however many labels there are. output ending in .pdf
+    gets one multi-page PDF, streamed page by page through PdfWriter; anything
+    else is a folder of page_0001.png files.
+    """
+    as_pdf = output.lower().endswith(".pdf")
+    if as_pdf:
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        pdf = PdfWriter(output, dpi)
+    else:
+        os.makedirs(output, exist_ok=True)
+
+    written = 0
+    labels = 0
+    try:
+        for count, sheet in render_sheets(path, dpi, columns, rows, jobs or os.cpu_count() or 1, rooms_dir, names_dir):
+            if as_pdf:
+                pdf.add_page(sheet)
+            else:
+                sheet.save(os.path.join(output, f"page_{written + 1:04d}.png"), format="PNG", dpi=(dpi, dpi))
+            written += 1
+            labels += count
+    finally:
+        if as_pdf:
+            pdf.close()
+
+    return written, labels
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export printable A4 QR label sheets for rooms.")
+    parser.add_argument("path", help="room CSV file or folder (e.g. out/rooms)")
+    parser.add_argument("-o", "--output", default="labels.pdf", help="PDF file or folder for PNG pages")
+    parser.add_argument("--dpi", type=int, default=300)
+    parser.add_argument("--columns", type=int, default=3)
+    parser.add_argument("--rows", type=int, default=8)
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: CPU count)")
+    parser.add_argument("--rooms-dir", default=None, help="room tree the owners are looked up for (default: found from path)")
+    parser.add_argument("--names-dir", default=None, help="owner tree of parser.py (default: names next to the room tree)")
+    args = parser.parse_args()
+
+    pages, labels = export_labels(args.path, args.output, args.dpi, args.columns, args.rows, args.jobs, args.rooms_dir, args.names_dir)
+    print(f"Saved {labels} labels on {pages} pages to '{args.output}'.")
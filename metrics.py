@@ -0,0 +1,64 @@
+import sys
+import json
+import time
+
+PHASES = ("read", "group", "mkdir", "write")
+PROGRESS_INTERVAL = 2.0  # Seconds between progress lines
+
+
+class RunMetrics:
+    """
+    Phase timers, throttled progress and optional JSON-lines metrics for a parser run.
+
+    Callers add elapsed seconds to a phase with add() and report processed rows
+    with count(); both are meant to be called per batch, not per item. At most one
+    progress line is printed every progress_interval seconds (0 disables them).
+    With an output stream every progress line, group count and the final summary
+    is also written as one JSON object per line.
+    """
+
+    def __init__(self, output=None, progress_interval=PROGRESS_INTERVAL):
+        self.output = output
+        self.progress_interval = progress_interval
+        self.phases = dict.fromkeys(PHASES, 0.0)
+        self.rows = 0
+        self.start = self.last_report = time.perf_counter()
+        self.last_rows = 0
+
+    def add(self, phase, seconds):
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def count(self, rows):
+        self.rows += rows
+        if not self.progress_interval:
+            return
+        now = time.perf_counter()
+        if now - self.last_report < self.progress_interval:
+            return
+        rate = (self.rows - self.last_rows) / (now - self.last_report)
+        self.last_report, self.last_rows = now, self.rows
+        if self.output is not sys.stdout:
+            print(f"{self.rows:,} rows, {rate:,.0f} rows/s", flush=True)
+        self.emit("progress", rows=self.rows, rows_per_s=round(rate), elapsed=round(now - self.start, 3))
+
+    def emit(self, event, **fields):
+        if self.output is not None:
+            self.output.write(json.dumps({"event": event, **fields}, ensure_ascii=False) + "\n")
+
+    def summary(self):
+        """Prints (and emits) the total time, throughput and the time of every phase."""
+        elapsed = time.perf_counter() - self.start
+        phases = {phase: round(seconds, 3) for phase, seconds in self.phases.items()}
+        phases["other"] = round(max(0.0, elapsed - sum(self.phases.values())), 3)
+        rate = self.rows / elapsed if elapsed else 0
+        if self.output is not sys.stdout:
+            print(f"\n{self.rows:,} rows in {elapsed:.2f} s ({rate:,.0f} rows/s): "
+                  + ", ".join(f"{phase} {seconds:.2f} s" for phase, seconds in phases.items()))
+        self.emit("summary", rows=self.rows, elapsed=round(elapsed, 3), rows_per_s=round(rate), phases=phases)
+
+
+def open_metrics_output(path):
+    """Returns the stream for --metrics: stdout for "-", otherwise the file opened for writing."""
+    if path == "-":
+        return sys.stdout
+    return open(path, mode="w", encoding="utf-8")
@@ -1,6 +1,90 @@
 import os
+import io
+import sys
+import time
+import re
 import csv
-from collections import defaultdict
+import codecs
+import json
+import mmap
+import hashlib
+import argparse
+import importlib.util
+from itertools import islice
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from records import RecordStore
+from metrics import PROGRESS_INTERVAL, RunMetrics, open_metrics_output
+
+OWNER_PREFIX = "Odpovědná ososba:"
+MANIFEST_NAME = ".manifest.json"
+MAX_OPEN_FILES = 128  # Per GroupWriter; a run has two, well below the 512 handles of the Windows C runtime
+SAMPLE_SIZE = 64 * 1024  # Bytes read from the start, middle and end of a file to detect its format
+DELIMITERS = ";,\t|"
+ITEM_BATCH = 4096  # Items taken from the reader at a time, so phase timers run per batch
+
+
+def owner_line_pattern(encoding="utf-8", delimiter=";"):
+    """
+    Returns a regex matching a superset of the raw lines whose first column can be
+    an owner header in the given encoding; candidates are verified with the same
+    check iter_items uses.
+    """
+    encoding = "utf-8" if encoding == "utf-8-sig" else encoding
+
+    def either(*chars):
+        return b"(?:" + b"|".join(re.escape(char.encode(encoding)) for char in chars) + b")"
+
+    first_column = b"[^" + re.escape(delimiter.encode(encoding)) + b"\n]*?"
+    return re.compile(b"^" + first_column + b"odpov" + either("ě", "Ě") + b"dn" + either("á", "Á") + b" ososba:", re.IGNORECASE | re.MULTILINE)
+
+
+OWNER_LINE = owner_line_pattern()
+
+
+def read_samples(file_path, sample_size=SAMPLE_SIZE):
+    """Returns up to three byte samples of a file: its start, middle and end."""
+    with open(file_path, mode="rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        samples = []
+        for position in sorted({0, max(0, size // 2 - sample_size // 2), max(0, size - sample_size)}):
+            f.seek(position)
+            samples.append((position, f.read(sample_size)))
+    return samples
+
+
+def detect_format(file_path):
+    """
+    Detects the encoding and delimiter of a MANKO export from samples of the file.
+
+    Returns (encoding, delimiter). Samples that are valid UTF-8 mean "utf-8" (or
+    "utf-8-sig" with a byte order mark), anything else is taken for cp1250, the
+    other encoding our accounting system exports. The delimiter is the candidate
+    that splits most sample lines into the six or more MANKO columns.
+    """
+    samples = read_samples(file_path)
+    encoding = "utf-8-sig" if samples and samples[0][1].startswith(b"\xef\xbb\xbf") else "utf-8"
+    for position, sample in samples:
+        if position > 0:
+            sample = sample.lstrip(bytes(range(0x80, 0xc0)))  # Drop a character cut off by the sample start
+        try:
+            codecs.getincrementaldecoder("utf-8")().decode(sample, final=False)
+        except UnicodeDecodeError:
+            encoding = "cp1250"
+            break
+
+    lines = []
+    for position, sample in samples:
+        sample_lines = sample.decode(encoding, errors="replace").splitlines()
+        lines += sample_lines[1 if position else 0:-1] if len(sample_lines) > 2 else sample_lines  # Skip cut-off lines
+    scores = {delimiter: sum(1 for line in lines if line.count(delimiter) >= 5) for delimiter in DELIMITERS}
+    delimiter = max(DELIMITERS, key=lambda candidate: scores[candidate])  # Ties keep ";", the first candidate
+    return encoding, delimiter if scores[delimiter] else ";"
+
+
+def arrow_available():
+    return importlib.util.find_spec("pyarrow") is not None
+
 
 def create_nested_folder_structure(base_folder, sub_keys):
     """Creates nested folder structure for a list of sub-keys."""
@@ -11,142 +95,607 @@ def create_nested_folder_structure(base_folder, sub_keys):
     return current_path
 
 
-def process_and_save_by_rooms(file_path, output_dir="out/rooms"):
-    location_data = defaultdict(lambda: defaultdict(list))
-    total_items = 0
+def split_location(location_field):
+    """Splits a location field into the main key and a tuple of sub-keys."""
+    location_parts = location_field.split("/")
+    main_key = location_parts[0].strip()
+    sub_keys = tuple(part.strip() for part in location_parts[1:])
+    return main_key, sub_keys
 
-    try:
-        with open(file_path, mode="r", encoding="utf-8") as csvfile:
-            reader = csv.reader(csvfile, delimiter=";")
-            next(reader)  # Skip the header row
-
-            for row in reader:
-                if len(row) > 5:
-                    location_field = row[5].strip()
-
-                    if "Lokalita" not in location_field:
-                        location_parts = location_field.split("/")
-                        main_key = location_parts[0].strip()
-                        sub_keys = [part.strip() for part in location_parts[1:]]
-
-                        if len(sub_keys) > 0:
-                            inventarni_cislo = row[0].strip()
-                            nazev = row[1].strip()
-                            location_data[main_key][tuple(sub_keys)].append((inventarni_cislo, nazev))
-                            total_items += 1
-
-        os.makedirs(output_dir, exist_ok=True)
-
-        for main_key, sub_dict in location_data.items():
-            main_folder = os.path.join(output_dir, main_key)
-            os.makedirs(main_folder, exist_ok=True)
-
-            for sub_keys, items in sub_dict.items():
-                # Create nested folder structure for sub-keys
-                sub_folder = create_nested_folder_structure(main_folder, sub_keys)
-                # The last part of sub_keys is used as the file name
-                file_name = f"{sub_keys[-1]}.csv"
-                file_path = os.path.join(sub_folder, file_name)
-                with open(file_path, mode="w", encoding="utf-8", newline="") as csvfile:
-                    writer = csv.writer(csvfile, delimiter=";", quoting=csv.QUOTE_NONE, escapechar='\\')
-                    writer.writerow([f"{main_key}/{'/'.join(sub_keys)}", f"Místnost: {main_key}/{'/'.join(sub_keys)}", ""])
-                    for inventarni_cislo, nazev in items:
-                        writer.writerow([f"{inventarni_cislo}", "", f"{nazev}"])
-
-        print("\nStatistics:")
-        for main_key, sub_dict in location_data.items():
-            main_count = sum(len(items) for items in sub_dict.values())
-            print(f"{main_key}: {main_count} items")
-            for sub_keys, items in sub_dict.items():
-                print(f"\t{'/'.join(sub_keys)}: {len(items)} items")
-
-        print(f"\nTotal items across all locations: {total_items}")
-        print(f"All data successfully saved to the '{output_dir}' directory.")
 
-    except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
-    except Exception as e:
-        print(f"An error occurred: {e}")
+def is_owner_header(row):
+    return len(row) > 0 and row[0].strip().lower().startswith(OWNER_PREFIX.lower())
 
 
-def process_and_save_by_owner(file_path, output_dir="out/names"):
-    owner_data = defaultdict(lambda: defaultdict(lambda: defaultdict(list)))
-    total_items = 0
+def iter_items(reader, skip_header=True, owner=None, owner_skip=0, on_owner=None):
+    """
+    Walks the MANKO rows once and yields every item for both outputs.
+
+    Yields (main_key, sub_keys, inventarni_cislo, nazev, in_rooms, owner) tuples.
+    in_rooms tells whether the item belongs to the room output and owner is None
+    when the item does not belong to the owner output. owner and owner_skip give
+    the owner state in effect before the first row, for readers that start in
+    the middle of the file.
+    """
+    for row_number, row in enumerate(reader):
+        in_rooms = row_number > 0 or not skip_header
+        in_names = owner_skip == 0
+        if owner_skip:
+            owner_skip -= 1  # The two rows after an owner header are not items
+
+        if in_names and is_owner_header(row):
+            owner = row[0].strip().replace(OWNER_PREFIX, "").strip()
+            if on_owner:
+                on_owner(owner)
+            owner_skip = 2
+            in_names = False
+
+        in_names = in_names and bool(owner)
+
+        if len(row) > 5 and (in_rooms or in_names):
+            location_field = row[5].strip()
+
+            if "Lokalita" not in location_field:
+                main_key, sub_keys = split_location(location_field)
+
+                if len(sub_keys) > 0:
+                    inventarni_cislo = row[0].strip()
+                    nazev = row[1].strip()
+                    yield main_key, sub_keys, inventarni_cislo, nazev, in_rooms, owner if in_names else None
+
+
+def group_path(folders, main_key, sub_keys):
+    """Returns the path of a group file relative to its output directory."""
+    # The last part of sub_keys is used as the file name
+    return os.path.join(*folders, main_key, *sub_keys[:-1], f"{sub_keys[-1]}.csv")
 
+
+def group_header(main_key, sub_keys):
+    return [f"{main_key}/{'/'.join(sub_keys)}", f"Místnost: {main_key}/{'/'.join(sub_keys)}", ""]
+
+
+class GroupWriter:
+    """
+    Streams rows into one CSV file per location group under an output directory.
+
+    Rows are buffered per group and written out once max_pending rows are waiting,
+    so each flush touches every dirty group file once. At most max_open files are
+    kept open; the least recently used one is closed when another group needs a
+    handle and is reopened for appending later. Directories that were already
+    created are remembered, so every folder costs a single makedirs call per run.
+
+    A content hash is kept for every group that passes through the writer. With
+    staged set every group is written to a .tmp file next to its target and
+    commit() then only moves the files whose content changed in place. The
+    seconds spent creating folders and writing files are summed in mkdir_time
+    and write_time.
+    """
+
+    def __init__(self, output_dir, max_open=MAX_OPEN_FILES, max_pending=100000, staged=False):
+        self.output_dir = output_dir
+        self.max_open = max_open
+        self.max_pending = max_pending
+        self.staged = staged
+        self.files = OrderedDict()  # Open (csvfile, writer) pairs in LRU order
+        self.paths = {}  # File path of every group written during this run
+        self.hashes = {}
+        self.pending = {}
+        self.pending_rows = 0
+        self.known_dirs = set()
+        self.mkdir_time = 0.0
+        self.write_time = 0.0
+
+    def ensure_dir(self, path):
+        """Creates a directory (and its parents) unless it was already created."""
+        if path in self.known_dirs:
+            return
+        start = time.perf_counter()
+        os.makedirs(path, exist_ok=True)
+        self.mkdir_time += time.perf_counter() - start
+        while path and path not in self.known_dirs:
+            self.known_dirs.add(path)
+            path = os.path.dirname(path)
+
+    def write(self, folders, main_key, sub_keys, row):
+        """Queues a row for the group file, creating it with its room header on first flush."""
+        key = (folders, main_key, sub_keys)
+        digest = self.hashes.get(key)
+        if digest is None:
+            digest = self.hashes[key] = hashlib.sha1()
+            digest.update(("\x1f".join(group_header(main_key, sub_keys)) + "\n").encode("utf-8"))
+        digest.update(("\x1f".join(row) + "\n").encode("utf-8"))
+
+        rows = self.pending.get(key)
+        if rows is None:
+            rows = self.pending[key] = []
+        rows.append(row)
+        self.pending_rows += 1
+        if self.pending_rows >= self.max_pending:
+            self.flush()
+
+    def flush(self):
+        start = time.perf_counter()
+        mkdir_time = self.mkdir_time
+        for key, rows in self.pending.items():
+            handle = self.files.get(key)
+            if handle is None:
+                handle = self.open_group(key)
+            else:
+                self.files.move_to_end(key)
+            handle[1].writerows(rows)
+        self.pending.clear()
+        self.pending_rows = 0
+        self.write_time += time.perf_counter() - start - (self.mkdir_time - mkdir_time)
+
+    def open_group(self, key):
+        if len(self.files) >= self.max_open:
+            _, (old_file, _) = self.files.popitem(last=False)
+            old_file.close()
+
+        file_path = self.paths.get(key)
+        if file_path is None:
+            file_path = os.path.join(self.output_dir, group_path(*key)) + (".tmp" if self.staged else "")
+            self.ensure_dir(os.path.dirname(file_path))
+            self.paths[key] = file_path
+            csvfile = open(file_path, mode="w", encoding="utf-8", newline="")
+            writer = csv.writer(csvfile, delimiter=";", quoting=csv.QUOTE_NONE, escapechar='\\')
+            writer.writerow(group_header(key[1], key[2]))
+        else:
+            csvfile = open(file_path, mode="a", encoding="utf-8", newline="")
+            writer = csv.writer(csvfile, delimiter=";", quoting=csv.QUOTE_NONE, escapechar='\\')
+
+        self.files[key] = (csvfile, writer)
+        return csvfile, writer
+
+    def manifest(self):
+        """Returns the {relative path: content hash} manifest of every group seen."""
+        return {group_path(*key).replace(os.sep, "/"): digest.hexdigest() for key, digest in self.hashes.items()}
+
+    def close(self):
+        self.flush()
+        start = time.perf_counter()
+        for csvfile, _ in self.files.values():
+            csvfile.close()
+        self.files.clear()
+        self.write_time += time.perf_counter() - start
+
+    def commit(self, old_groups):
+        """
+        Closes a staged writer and moves the files of changed groups over their targets.
+
+        A group is unchanged when old_groups (a manifest) has the same hash and its
+        file still exists; its staged file is dropped and the target keeps its
+        mtime. Returns the number of files replaced.
+        """
+        self.close()
+        start = time.perf_counter()
+        replaced = 0
+        for key, staged_path in self.paths.items():
+            relative_path = group_path(*key)
+            target = os.path.join(self.output_dir, relative_path)
+            if old_groups.get(relative_path.replace(os.sep, "/")) == self.hashes[key].hexdigest() and os.path.isfile(target):
+                os.remove(staged_path)
+            else:
+                os.replace(staged_path, target)
+                replaced += 1
+        self.paths.clear()
+        self.write_time += time.perf_counter() - start
+        return replaced
+
+    def discard(self):
+        """Closes the writer and deletes the staged files that were not committed."""
+        self.close()
+        if self.staged:
+            for staged_path in self.paths.values():
+                try:
+                    os.remove(staged_path)
+                except FileNotFoundError:
+                    pass
+            self.paths.clear()
+
+
+def load_manifest(output_dir):
+    """Loads the group manifest of an output directory, or None if there is none."""
     try:
-        with open(file_path, mode="r", encoding="utf-8") as csvfile:
-            reader = csv.reader(csvfile, delimiter=";")
-            owner = None
-
-            for row in reader:
-                if len(row) > 0:
-                    first_col = row[0].strip()
-
-                    if first_col.lower().startswith("odpovědná ososba:"):
-                        owner = first_col.replace("Odpovědná ososba:", "").strip()
-                        print(f"Detected owner: {owner}")
-                        next(reader, None)
-                        next(reader, None)
-                    elif owner and len(row) > 5:
-                        location_field = row[5].strip()
-
-                        if "Lokalita" not in location_field:
-                            location_parts = location_field.split("/")
-                            main_key = location_parts[0].strip()
-                            sub_keys = [part.strip() for part in location_parts[1:]]
-
-                            if len(sub_keys) > 0:
-                                inventarni_cislo = row[0].strip()
-                                nazev = row[1].strip()
-                                owner_data[owner][main_key][tuple(sub_keys)].append((inventarni_cislo, nazev))
-                                total_items += 1
-
-        os.makedirs(output_dir, exist_ok=True)
-
-        for owner, locations in owner_data.items():
-            owner_folder = os.path.join(output_dir, owner)
-            os.makedirs(owner_folder, exist_ok=True)
+        with open(os.path.join(output_dir, MANIFEST_NAME), mode="r", encoding="utf-8") as f:
+            return json.load(f)["groups"]
+    except (FileNotFoundError, ValueError, KeyError):
+        return None
 
+
+def save_manifest(output_dir, groups):
+    manifest_path = os.path.join(output_dir, MANIFEST_NAME)
+    with open(manifest_path + ".tmp", mode="w", encoding="utf-8") as f:
+        json.dump({"version": 1, "groups": groups}, f, ensure_ascii=False, indent=0, sort_keys=True)
+    os.replace(manifest_path + ".tmp", manifest_path)
+
+
+def remove_stale_groups(output_dir, old_groups, new_groups):
+    """Deletes the group files that are no longer in the manifest and prunes empty folders."""
+    removed = 0
+    output_dir = os.path.normpath(output_dir)
+    for relative_path in old_groups.keys() - new_groups.keys():
+        file_path = os.path.join(output_dir, *relative_path.split("/"))
+        try:
+            os.remove(file_path)
+            removed += 1
+        except FileNotFoundError:
+            pass
+        folder = os.path.dirname(file_path)
+        while folder != output_dir and folder.startswith(output_dir):
+            try:
+                os.rmdir(folder)
+            except OSError:
+                break  # Not empty
+            folder = os.path.dirname(folder)
+    return removed
+
+
+def find_shard_ranges(file_path, jobs):
+    """Splits the file into at most jobs byte ranges that start at line boundaries."""
+    size = os.path.getsize(file_path)
+    bounds = [0]
+    with open(file_path, mode="rb") as f:
+        for shard in range(1, jobs):
+            position = size * shard // jobs
+            if position <= bounds[-1]:
+                continue
+            f.seek(position - 1)
+            f.readline()  # Move to the start of the next line
+            if bounds[-1] < f.tell() < size:
+                bounds.append(f.tell())
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def count_rows_between(mm, start, end, limit=2):
+    """Counts the line breaks in mm[start:end], stopping once limit is reached."""
+    count = 0
+    while count < limit:
+        start = mm.find(b"\n", start, end)
+        if start == -1:
+            break
+        count += 1
+        start += 1
+    return count
+
+
+def find_shard_owners(file_path, starts, encoding="utf-8", delimiter=";"):
+    """
+    Scans the raw file for owner headers and returns them with the owner state
+    in effect at every shard start.
+
+    Returns (owners, states): owners lists every detected owner in file order and
+    states holds one (owner, owner_skip) pair per start offset, where owner_skip
+    is the number of rows the shard still has to skip after a header that sits
+    right before its start.
+    """
+    owners = []
+    headers = []  # (offset after the header line, owner)
+    with open(file_path, mode="rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return owners, [(None, 0) for _ in starts]
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            owner_line = OWNER_LINE if (encoding, delimiter) == ("utf-8", ";") else owner_line_pattern(encoding, delimiter)
+            for match in owner_line.finditer(mm):
+                line_start = match.start()
+                # Rows consumed right after an accepted header are never headers themselves
+                if headers and count_rows_between(mm, headers[-1][0], line_start) < 2:
+                    continue
+                end = mm.find(b"\n", line_start)
+                line_end = len(mm) if end == -1 else end + 1
+                line = mm[line_start:line_end].decode(encoding)
+                if line_start == 0 and line.startswith("\ufeff"):
+                    line = line[1:]
+                row = next(csv.reader([line], delimiter=delimiter), [])
+                if is_owner_header(row):
+                    owner = row[0].strip().replace(OWNER_PREFIX, "").strip()
+                    owners.append(owner)
+                    headers.append((line_end, owner))
+
+            states = []
+            index = 0
+            for start in starts:
+                while index < len(headers) and headers[index][0] <= start:
+                    index += 1
+                if index == 0:
+                    states.append((None, 0))
+                else:
+                    header_end, owner = headers[index - 1]
+                    states.append((owner, 2 - count_rows_between(mm, header_end, start)))
+    return owners, states
+
+
+def split_shard(file_path, start, end, owner, owner_skip, encoding="utf-8", delimiter=";"):
+    """Collects the items of one byte range into a RecordStore; runs inside a worker process."""
+    store = RecordStore()
+    with open(file_path, mode="rb") as f:
+        f.seek(start)
+        data = f.read(end - start)
+
+    reader = csv.reader(io.TextIOWrapper(io.BytesIO(data), encoding=encoding), delimiter=delimiter)
+    for item in iter_items(reader, skip_header=start == 0, owner=owner, owner_skip=owner_skip):
+        store.append(*item)
+    return store
+
+
+def iter_items_parallel(file_path, jobs, on_owner=None, encoding="utf-8", delimiter=";"):
+    """
+    Splits the file into line-aligned shards, parses them in a process pool and
+    yields the merged items in the same per-group order as iter_items.
+
+    Items come out group by group (rooms first, then owners), so every output
+    file and every statistics line matches the serial run. The input must not
+    contain quoted fields spanning several lines.
+    """
+    ranges = find_shard_ranges(file_path, jobs)
+    owners, states = find_shard_owners(file_path, [start for start, _ in ranges], encoding, delimiter)
+    if on_owner:
+        for owner in owners:
+            on_owner(owner)
+
+    store = RecordStore()
+    with ProcessPoolExecutor(max_workers=len(ranges)) as executor:
+        futures = [
+            executor.submit(split_shard, file_path, start, end, owner, owner_skip, encoding, delimiter)
+            for (start, end), (owner, owner_skip) in zip(ranges, states)
+        ]
+        for future in futures:
+            store.extend(future.result())
+
+    inventory_numbers, names = store.inventory_numbers, store.names
+    for (main_key, sub_keys), indices in store.room_groups():
+        for index in indices:
+            yield main_key, sub_keys, inventory_numbers[index], names[index], True, None
+    for (owner, main_key, sub_keys), indices in store.owner_groups():
+        for index in indices:
+            yield main_key, sub_keys, inventory_numbers[index], names[index], False, owner
+
+
+def iter_file_items(file_path, jobs=1, on_owner=None, snapshot=False, engine="python"):
+    """
+    Yields the items of a MANKO file, serially or sharded across jobs processes.
+
+    The encoding and delimiter are detected from samples of the file. engine
+    "python" uses the csv module. "arrow" is opt-in and needs pyarrow: it parses
+    the file in chunks and does the location split and grouping as columnar
+    operations (see arrow_ingest.py), but it holds the whole table in memory,
+    ignores jobs and does not support quoted fields spanning several lines.
+
+    With snapshot set the items come from the file's memory-mapped snapshot,
+    which is compiled first when missing or out of date.
+    """
+    if snapshot:
+        import snapshot as snapshots  # snapshot.py imports this module to compile
+
+        compiled = snapshots.open_snapshot(file_path, jobs=jobs)
+        try:
+            for owner in compiled.detected_owners if on_owner else ():
+                on_owner(owner)
+            yield from compiled.iter_items()
+        finally:
+            compiled.close()
+        return
+
+    if engine == "arrow" and not arrow_available():
+        raise ImportError("The arrow engine needs pyarrow (pip install pyarrow).")
+    encoding, delimiter = detect_format(file_path)
+    if engine == "arrow":
+        import arrow_ingest  # Optional: needs pyarrow, and imports this module
+
+        yield from arrow_ingest.iter_items_arrow(file_path, encoding, delimiter, on_owner=on_owner)
+        return
+
+    if jobs > 1:
+        yield from iter_items_parallel(file_path, jobs, on_owner, encoding, delimiter)
+        return
+
+    with open(file_path, mode="r", encoding=encoding) as csvfile:
+        reader = csv.reader(csvfile, delimiter=delimiter)
+        yield from iter_items(reader, on_owner=on_owner)
+
+
+def print_room_statistics(room_counts, total_items, output_dir, metrics=None):
+    """Prints the item count of every room, or emits it as metrics when they are enabled."""
+    if metrics is not None and metrics.output is not None:
+        for main_key, sub_dict in room_counts.items():
+            for sub_keys, count in sub_dict.items():
+                metrics.emit("group", output=output_dir, location=f"{main_key}/{'/'.join(sub_keys)}", items=count)
+        metrics.emit("total", output=output_dir, items=total_items)
+        return
+
+    # Built first and printed at once: one print per line is slow with tens of thousands of groups
+    lines = ["\nStatistics:"]
+    for main_key, sub_dict in room_counts.items():
+        lines.append(f"{main_key}: {sum(sub_dict.values())} items")
+        for sub_keys, count in sub_dict.items():
+            lines.append(f"\t{'/'.join(sub_keys)}: {count} items")
+
+    lines.append(f"\nTotal items across all locations: {total_items}")
+    lines.append(f"All data successfully saved to the '{output_dir}' directory.")
+    print("\n".join(lines))
+
+
+def print_owner_statistics(owner_counts, total_items, output_dir, metrics=None):
+    """Prints the item count of every owner and room, or emits it as metrics when they are enabled."""
+    if metrics is not None and metrics.output is not None:
+        for owner, locations in owner_counts.items():
             for main_key, sub_dict in locations.items():
-                main_folder = os.path.join(owner_folder, main_key)
-                os.makedirs(main_folder, exist_ok=True)
-
-                for sub_keys, items in sub_dict.items():
-                    # Create nested folder structure for sub-keys
-                    sub_folder = create_nested_folder_structure(main_folder, sub_keys)
-                    # The last part of sub_keys is used as the file name
-                    file_name = f"{sub_keys[-1]}.csv"
-                    file_path = os.path.join(sub_folder, file_name)
-                    with open(file_path, mode="w", encoding="utf-8", newline="") as csvfile:
-                        writer = csv.writer(csvfile, delimiter=";", quoting=csv.QUOTE_NONE, escapechar='\\')
-                        writer.writerow([f"{main_key}/{'/'.join(sub_keys)}", f"Místnost: {main_key}/{'/'.join(sub_keys)}", ""])
-                        for inventarni_cislo, nazev in items:
-                            writer.writerow([f"{inventarni_cislo}", owner, f"{nazev}"])
-
-        print("\nStatistics by owner:")
-        for owner, locations in owner_data.items():
-            print(f"{owner}:")
-            for main_key, sub_dict in locations.items():
-                main_count = sum(len(items) for items in sub_dict.values())
-                print(f"\t{main_key}: {main_count} items")
-                for sub_keys, items in sub_dict.items():
-                    print(f"\t\t{'/'.join(sub_keys)}: {len(items)} items")
+                for sub_keys, count in sub_dict.items():
+                    metrics.emit("group", output=output_dir, owner=owner, location=f"{main_key}/{'/'.join(sub_keys)}", items=count)
+        metrics.emit("total", output=output_dir, items=total_items)
+        return
+
+    lines = ["\nStatistics by owner:"]
+    for owner, locations in owner_counts.items():
+        lines.append(f"{owner}:")
+        for main_key, sub_dict in locations.items():
+            lines.append(f"\t{main_key}: {sum(sub_dict.values())} items")
+            for sub_keys, count in sub_dict.items():
+                lines.append(f"\t\t{'/'.join(sub_keys)}: {count} items")
 
-        print(f"\nTotal items across all owners and locations: {total_items}")
-        print(f"All data successfully saved to the '{output_dir}' directory.")
+    lines.append(f"\nTotal items across all owners and locations: {total_items}")
+    lines.append(f"All data successfully saved to the '{output_dir}' directory.")
+    print("\n".join(lines))
+
+
+def writer_times(*writers):
+    """Returns the seconds the writers spent in mkdir and in writing files so far."""
+    writers = [writer for writer in writers if writer]
+    return sum(writer.mkdir_time for writer in writers), sum(writer.write_time for writer in writers)
+
+
+def split_items(file_path, jobs, room_writer, owner_writer, on_owner=None, snapshot=False, engine="python", metrics=None):
+    """
+    Feeds every item of the file to the writers and returns the statistics counters.
+
+    Progress counts source rows: items of the room output only, since the
+    parallel, snapshot and arrow paths yield a row's room and owner items
+    separately.
+
+    Items are taken in batches of ITEM_BATCH, so the timers of metrics cost a few
+    clock reads per batch: the time to produce a batch counts as read, the time to
+    hand it to the writers as group, minus what the writers spent in mkdir and
+    in writing files (those are added from the writers once they are closed).
+    """
+    room_counts = defaultdict(lambda: defaultdict(int))
+    owner_counts = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    room_total = owner_total = 0
+    metrics = metrics or RunMetrics(progress_interval=0)
+
+    items = iter_file_items(file_path, jobs, on_owner, snapshot, engine)
+    while True:
+        start = time.perf_counter()
+        batch = list(islice(items, ITEM_BATCH))
+        read_end = time.perf_counter()
+        if not batch:
+            metrics.add("read", read_end - start)
+            break
+        mkdir_time, write_time = writer_times(room_writer, owner_writer)
+
+        for main_key, sub_keys, inventarni_cislo, nazev, in_rooms, owner in batch:
+            if in_rooms and room_writer:
+                room_writer.write((), main_key, sub_keys, [f"{inventarni_cislo}", "", f"{nazev}"])
+                room_counts[main_key][sub_keys] += 1
+                room_total += 1
+            if owner and owner_writer:
+                owner_writer.write((owner,), main_key, sub_keys, [f"{inventarni_cislo}", owner, f"{nazev}"])
+                owner_counts[owner][main_key][sub_keys] += 1
+                owner_total += 1
+
+        new_mkdir_time, new_write_time = writer_times(room_writer, owner_writer)
+        metrics.add("read", read_end - start)
+        metrics.add("group", time.perf_counter() - read_end - (new_mkdir_time - mkdir_time) - (new_write_time - write_time))
+        metrics.count(sum(1 for item in batch if item[4]))
+
+    return room_counts, room_total, owner_counts, owner_total
+
+
+def process_and_save(file_path, rooms_dir="out/rooms", names_dir="out/names", jobs=1, incremental=True, snapshot=False, engine="python", metrics=None):
+    """
+    Reads MANKO.csv once and streams every item into the room and owner trees.
+
+    Rows are written as they are read, so only per-group counters are kept in
+    memory. Pass None as rooms_dir or names_dir to skip that output. With jobs > 1
+    the file is parsed in a process pool instead and the groups are merged in
+    memory before writing; the output is identical to the serial run.
+
+    Every output directory keeps a manifest with a content hash per group file.
+    When incremental is set and a manifest exists, every group is written to a
+    temporary file next to its target and only the files whose content changed
+    replace their targets, so unchanged files keep their mtime; the files of
+    groups that disappeared are deleted.
+
+    With snapshot set the items are read from the MANKO.csv.snap snapshot (see
+    snapshot.py) instead of parsing the CSV.
+    engine selects the CSV engine, see iter_file_items.
+
+    metrics is an optional RunMetrics (see metrics.py) that times the read,
+    group, mkdir and write phases and reports progress; when it has an output
+    stream the statistics go there as JSON lines instead of being printed.
+    """
+    output_dirs = [output_dir for output_dir in (rooms_dir, names_dir) if output_dir]
+    old_manifests = {output_dir: load_manifest(output_dir) if incremental else None for output_dir in output_dirs}
+    writers = {}
+    on_owner = (lambda owner: print(f"Detected owner: {owner}")) if names_dir else None
+    if names_dir and metrics is not None and metrics.output is not None:
+        on_owner = lambda owner: metrics.emit("owner", owner=owner)  # noqa: E731
+
+    try:
+        for output_dir in output_dirs:
+            # Without a manifest every group is written to its target right away
+            writers[output_dir] = GroupWriter(output_dir, staged=old_manifests[output_dir] is not None)
+        room_counts, room_total, owner_counts, owner_total = split_items(
+            file_path, jobs, writers.get(rooms_dir), writers.get(names_dir), on_owner, snapshot, engine, metrics
+        )
+
+        for output_dir, writer in writers.items():
+            os.makedirs(output_dir, exist_ok=True)
+            new_groups = writer.manifest()
+            old_groups = old_manifests[output_dir]
+            if old_groups is None:
+                writer.close()
+            else:
+                rewritten = writer.commit(old_groups)
+                removed = remove_stale_groups(output_dir, old_groups, new_groups)
+                if metrics is not None and metrics.output is not None:
+                    metrics.emit("rewrite", output=output_dir, rewritten=rewritten, files=len(new_groups), removed=removed)
+                else:
+                    print(f"\n{output_dir}: rewrote {rewritten} of {len(new_groups)} files, removed {removed}.")
+            save_manifest(output_dir, new_groups)
+
+        if metrics is not None:
+            mkdir_time, write_time = writer_times(*writers.values())
+            metrics.add("mkdir", mkdir_time)
+            metrics.add("write", write_time)
+        if rooms_dir:
+            print_room_statistics(room_counts, room_total, rooms_dir, metrics)
+        if names_dir:
+            print_owner_statistics(owner_counts, owner_total, names_dir, metrics)
+        if metrics is not None:
+            metrics.summary()
 
     except FileNotFoundError:
-        print(f"Error: File '{file_path}' not found.")
+        print(f"Error: File '{file_path}' not found.", file=sys.stderr)
     except Exception as e:
-        print(f"An error occurred: {e}")
+        print(f"An error occurred: {e}", file=sys.stderr)
+    finally:
+        for writer in writers.values():
+            writer.discard()  # Staged files of a failed run
+
+
+def process_and_save_by_rooms(file_path, output_dir="out/rooms"):
+    process_and_save(file_path, rooms_dir=output_dir, names_dir=None)
+
+
+def process_and_save_by_owner(file_path, output_dir="out/names"):
+    process_and_save(file_path, rooms_dir=None, names_dir=output_dir)
 
 
 if __name__ == "__main__":
-    # Specify the path to the CSV file
-    file_path = "MANKO.csv"
-    output_dir_by_rooms = "out/rooms"
-    output_dir_by_owner = "out/names"
-    print("Processing data by locations...")
-    process_and_save_by_rooms(file_path, output_dir_by_rooms)
-    print("\nProcessing data by owners...")
-    process_and_save_by_owner(file_path, output_dir_by_owner)
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Split a MANKO.csv export into per-room and per-owner CSV files.")
+    parser.add_argument("file_path", nargs="?", default="MANKO.csv", help="path to the CSV file")
+    parser.add_argument("--rooms-dir", default="out/rooms")
+    parser.add_argument("--names-dir", default="out/names")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes (default: 1)")
+    parser.add_argument("--full", action="store_true", help="rewrite every file instead of only the changed ones")
+    parser.add_argument("--snapshot", action="store_true", help="read the items from the compiled <file_path>.snap snapshot")
+    parser.add_argument("--engine", choices=["python", "arrow"], default="python", help="CSV engine; arrow needs pyarrow (default: %(default)s)")
+    parser.add_argument("--metrics", default=None, help="write phase timings, progress and statistics as JSON lines to this file ('-' for stdout)")
+    parser.add_argument("--progress", type=float, default=PROGRESS_INTERVAL, help="seconds between progress lines, 0 to disable (default: %(default)s)")
+    args = parser.parse_args()
+    if args.engine == "arrow" and not arrow_available():
+        parser.error("--engine arrow needs pyarrow; install it with 'pip install pyarrow' or use --engine python")
+
+    metrics_output = open_metrics_output(args.metrics) if args.metrics else None
+    metrics = RunMetrics(metrics_output, progress_interval=args.progress)
+    if metrics_output is not sys.stdout:
+        print("Processing data by locations and owners...")
+    try:
+        process_and_save(
+            args.file_path, args.rooms_dir, args.names_dir, jobs=args.jobs, incremental=not args.full,
+            snapshot=args.snapshot, engine=args.engine, metrics=metrics,
+        )
+    finally:
+        if metrics_output is not None and metrics_output is not sys.stdout:
+            metrics_output.close()
@@ -0,0 +1,146 @@
+import io
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image
+
+
+def default_cache_dir():
+    """Returns the per-user folder for rendered QR codes."""
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "inventurazice", "qr")
+
+
+class QRCache:
+    """
+    Content-addressed cache of rendered QR code images.
+
+    Images are keyed by the code and the render size. Lookups go through an
+    in-memory LRU of PIL images first, then through PNG files on disk, and only
+    then call render(code, size). namespace should change whenever the render
+    function starts producing different images. The disk store is capped at max_bytes; once it
+    grows past the cap the least recently used files are deleted. The disk store
+    is best effort: any I/O error just falls back to rendering.
+    """
+
+    def __init__(self, render, cache_dir=None, max_items=512, max_bytes=64 * 1024 * 1024, namespace=""):
+        self.render = render
+        self.namespace = namespace
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.disk_usage = None  # Computed on the first store
+        self.lock = threading.Lock()
+
+    def key(self, code, size):
+        return hashlib.sha1(f"{self.namespace}:{size[0]}x{size[1]}:{code}".encode("utf-8")).hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.png")
+
+    def peek(self, code, size):
+        """Returns the image if it is already in memory, without touching the disk."""
+        with self.lock:
+            return self.images.get(self.key(code, size))
+
+    def get(self, code, size):
+        """Returns the QR image for code rendered at size (a (width, height) tuple)."""
+        key = self.key(code, size)
+        with self.lock:
+            image = self.images.get(key)
+            if image is not None:
+                self.images.move_to_end(key)
+                return image
+
+        image = self.load(key)
+        if image is None:
+            image = self.render(code, size)
+            self.store(key, image)
+
+        with self.lock:
+            self.images[key] = image
+            while len(self.images) > self.max_items:
+                self.images.popitem(last=False)
+        return image
+
+    def load(self, key):
+        path = self.path(key)
+        try:
+            with Image.open(path) as image:
+                image.load()
+            os.utime(path)  # Mark as recently used for eviction
+            return image
+        except (OSError, ValueError):
+            return None
+
+    def load_png(self, key):
+        """Returns the stored PNG file of a key as bytes, or None."""
+        path = self.path(key)
+        try:
+            with open(path, mode="rb") as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+
+    def store(self, key, image):
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG", optimize=True)
+        self.store_png(key, buffer.getvalue())
+
+    def store_png(self, key, data):
+        path = self.path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, mode="wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            return
+
+        with self.lock:
+            if self.disk_usage is None:
+                self.disk_usage = sum(size for _, size, _ in self.scan())
+            else:
+                self.disk_usage += len(data)
+            if self.disk_usage > self.max_bytes:
+                self.evict()
+
+    def scan(self):
+        """Yields (path, size, mtime) for every PNG in the disk store."""
+        try:
+            folders = list(os.scandir(self.cache_dir))
+        except OSError:
+            return
+        for folder in folders:
+            if not folder.is_dir():
+                continue
+            for entry in os.scandir(folder.path):
+                if entry.name.endswith(".png"):
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def evict(self):
+        """Deletes the least recently used files until the store is at 90 % of the cap."""
+        files = sorted(self.scan(), key=lambda item: item[2])
+        self.disk_usage = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if self.disk_usage <= self.max_bytes * 0.9:
+                break
+            try:
+                os.remove(path)
+                self.disk_usage -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Drops the in-memory images; the disk store is kept."""
+        with self.lock:
+            self.images.clear()
@@ -0,0 +1,189 @@
+from array import array
+
+
+class StringTable:
+    """Packed strings: all values UTF-8 encoded in one bytearray, plus an array of end offsets."""
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array("Q")
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __getitem__(self, index):
+        start = self.ends[index - 1] if index > 0 else 0
+        return self.data[start:self.ends[index]].decode("utf-8")
+
+    def append(self, value):
+        self.data += value.encode("utf-8")
+        self.ends.append(len(self.data))
+
+    def extend(self, other):
+        shift = len(self.data)
+        self.data += other.data
+        self.ends.extend(end + shift for end in other.ends)
+
+
+class InternTable:
+    """Distinct values referenced by integer ids, in first-seen order."""
+
+    def __init__(self, values=()):
+        self.values = []
+        self.ids = {}
+        for value in values:
+            self.intern(value)
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, value_id):
+        return self.values[value_id]
+
+    def intern(self, value):
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+    def __getstate__(self):
+        return self.values  # The id map is rebuilt on unpickling, which halves the payload
+
+    def __setstate__(self, values):
+        self.__init__(values)
+
+
+class RecordStore:
+    """
+    Compact columnar store of MANKO items.
+
+    Location paths (main_key, sub_keys) and owners are interned and referenced by
+    integer ids; owner id 0 stands for "not in the owner output". Inventory
+    numbers and names live in packed string tables, so a record costs a few bytes
+    of arrays instead of a tuple and several str objects.
+    """
+
+    def __init__(self):
+        self.locations = InternTable()
+        self.owners = InternTable([None])
+        self.location_ids = array("I")
+        self.owner_ids = array("I")
+        self.in_rooms = bytearray()
+        self.inventory_numbers = StringTable()
+        self.names = StringTable()
+
+    def __len__(self):
+        return len(self.location_ids)
+
+    def append(self, main_key, sub_keys, inventarni_cislo, nazev, in_rooms=True, owner=None):
+        """Adds an item in the tuple layout yielded by parser.iter_items."""
+        self.location_ids.append(self.locations.intern((main_key, sub_keys)))
+        self.owner_ids.append(self.owners.intern(owner))
+        self.in_rooms.append(1 if in_rooms else 0)
+        self.inventory_numbers.append(inventarni_cislo)
+        self.names.append(nazev)
+
+    def extend(self, other):
+        """Appends all records of another store, remapping its location and owner ids."""
+        location_map = [self.locations.intern(location) for location in other.locations.values]
+        owner_map = [self.owners.intern(owner) for owner in other.owners.values]
+        self.location_ids.extend(location_map[location_id] for location_id in other.location_ids)
+        self.owner_ids.extend(owner_map[owner_id] for owner_id in other.owner_ids)
+        self.in_rooms += other.in_rooms
+        self.inventory_numbers.extend(other.inventory_numbers)
+        self.names.extend(other.names)
+
+    def record(self, index):
+        """Returns (main_key, sub_keys, inventarni_cislo, nazev, in_rooms, owner) of one item."""
+        main_key, sub_keys = self.locations[self.location_ids[index]]
+        return (
+            main_key, sub_keys, self.inventory_numbers[index], self.names[index],
+            bool(self.in_rooms[index]), self.owners[self.owner_ids[index]],
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self.record(index)
+
+    def group(self, keys):
+        """
+        Yields (key, indices) for every distinct key, in first-seen order.
+
+        keys holds one group key per record, or None to leave the record out.
+        Records are bucketed with a counting sort into a single index array, so
+        no per-group lists are allocated; indices is a slice of that array.
+        """
+        ranks = {}
+        group_of = array("i")
+        for key in keys:
+            if key is None:
+                group_of.append(-1)
+            else:
+                rank = ranks.get(key)
+                if rank is None:
+                    rank = ranks[key] = len(ranks)
+                group_of.append(rank)
+
+        ends = array("I", bytes(4 * len(ranks)))
+        for rank in group_of:
+            if rank >= 0:
+                ends[rank] += 1
+        total = 0
+        for rank, count in enumerate(ends):
+            total += count
+            ends[rank] = total
+
+        order = array("I", bytes(4 * total))
+        cursors = array("I", [0]) + ends[:-1]
+        for index, rank in enumerate(group_of):
+            if rank >= 0:
+                order[cursors[rank]] = index
+                cursors[rank] += 1
+
+        start = 0
+        for key, end in zip(ranks, ends):
+            yield key, order[start:end]
+            start = end
+
+    def room_groups(self):
+        """Yields ((main_key, sub_keys), record indices) for the room output, in file order."""
+        keys = (location_id if in_rooms else None for location_id, in_rooms in zip(self.location_ids, self.in_rooms))
+        for location_id, indices in self.group(keys):
+            yield self.locations[location_id], indices
+
+    def owner_groups(self):
+        """Yields ((owner, main_key, sub_keys), record indices) for the owner output, in file order."""
+        keys = (key if key[0] else None for key in zip(self.owner_ids, self.location_ids))
+        for (owner_id, location_id), indices in self.group(keys):
+            yield (self.owners[owner_id], *self.locations[location_id]), indices
+
+    def view(self, indices=None, owner=None):
+        """Returns a RecordView of (inventarni_cislo, owner, nazev) entries for the viewer."""
+        return RecordView(self, range(len(self)) if indices is None else indices, owner)
+
+
+class RecordView:
+    """
+    Read-only sequence of (Inventarizační číslo, Owner, Name) tuples over selected records.
+
+    owner overrides the owner column, e.g. "" for the room output where the
+    owner is not shown.
+    """
+
+    def __init__(self, store, indices, owner=None):
+        self.store = store
+        self.indices = indices
+        self.owner = owner
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, position):
+        index = self.indices[position]
+        owner = self.owner if self.owner is not None else self.store.owners[self.store.owner_ids[index]] or ""
+        return (self.store.inventory_numbers[index], owner, self.store.names[index])
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self[position]
@@ -1,33 +1,122 @@
 import csv
+import re
+import mmap
 import qrcode
 import tkinter as tk
 from tkinter import messagebox
+from tkinter import simpledialog
+from tkinter import filedialog
 from tkinter import ttk
 from PIL import Image, ImageTk
 import os
+import time
 import unicodedata
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from qr_cache import QRCache
+from records import RecordStore
+from snapshot import Snapshot, open_snapshot, source_path_for
+from virtual_listbox import VirtualListbox
 
 removeCZChars = True
+PREFETCH_DISTANCE = 5  # Entries pre-rendered on each side of the current one
+SNAPSHOT_ROOM = "Room: "  # Prefixes of the entries listed inside a snapshot
+SNAPSHOT_OWNER = "Owner: "
+
+# Lines with at least three ';'-separated fields; shorter rows are skipped like malformed rows
+ENTRY_LINE = re.compile(rb"^[^;\n]*;[^;\n]*;.*$", re.MULTILINE)
+# A field starting with a quote; csv.reader treats quotes anywhere else (e.g. parser.py's 24\") as text
+QUOTED_FIELD = re.compile(rb'(?:^|;)"', re.MULTILINE)
+
+class RoomEntries:
+    """
+    Lazy, read-only sequence of (Inventarizační číslo, Owner, Name) entries of a room CSV.
+
+    The file is memory-mapped and only an array of row offsets is built up front;
+    a row is decoded when it is accessed. Entry 0 is the room itself, like in the
+    list returned for small files.
+    """
+
+    def __init__(self, csv_file):
+        self.file = open(csv_file, "rb")
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{csv_file} is empty")
+
+        first_line_end = self.mm.find(b"\n")
+        first_line_end = len(self.mm) if first_line_end == -1 else first_line_end + 1
+        first_line = self.mm[:first_line_end].decode("utf-8", errors="replace").rstrip("\r\n")
+        if not first_line:
+            self.close()
+            raise ValueError(f"{csv_file} does not start with a room name")
+        self.room_name = first_line.split(";")[0].strip()  # First line contains the room name
+        self.offsets = array("Q", (match.start() for match in ENTRY_LINE.finditer(self.mm, first_line_end)))
+
+    def __len__(self):
+        return len(self.offsets) + 1
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if index == 0:
+            return (self.room_name, self.room_name, self.room_name)  # Room as its own QR entry
+        if not 0 < index < len(self):
+            raise IndexError("room entry index out of range")
+
+        start = self.offsets[index - 1]
+        end = self.mm.find(b"\n", start)
+        line = self.mm[start:len(self.mm) if end == -1 else end].decode("utf-8", errors="replace")
+        row = line.rstrip("\r").split(";")
+        # Parse three values: Inventarizační číslo, Owner, Name
+        return (row[0].strip(), row[1].strip(), row[2].strip())
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def close(self):
+        self.mm.close()
+        self.file.close()
 
 # Function to load data from CSV
-def load_data(csv_file):
+def load_data(csv_file, show_errors=True):
+    """
+    Load a room CSV; errors are shown in a message box, or raised when show_errors is False.
+
+    Files without quoted fields are opened lazily as RoomEntries; other files are
+    parsed with the csv module into a compact RecordStore. Only a quote at the
+    start of a field makes a field quoted, like for csv.reader.
+    """
     evidence_entries = []
     room_name = ""
     try:
+        with open(csv_file, "rb") as rawfile:
+            with mmap.mmap(rawfile.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                quoted = QUOTED_FIELD.search(mm) is not None
+        if not quoted:
+            evidence_entries = RoomEntries(csv_file)
+            return evidence_entries.room_name, evidence_entries
+
+        store = RecordStore()
         with open(csv_file, newline='', encoding='utf-8') as csvfile:
             reader = csv.reader(csvfile, delimiter=';')
             room_name = next(reader)[0].strip()  # First line contains the room name
-            evidence_entries.append((room_name, room_name, room_name))  # Add room as its own QR entry
+            store.append(room_name, (), room_name, room_name, owner=room_name)  # Add room as its own QR entry
             for row in reader:
                 try:
                     # Parse three values: Inventarizační číslo, Owner, Name
                     inventarizacni_cislo = row[0].strip()
                     owner = row[1].strip()
                     name = row[2].strip()
-                    evidence_entries.append((inventarizacni_cislo, owner, name))
+                    store.append(room_name, (), inventarizacni_cislo, name, owner=owner)
                 except IndexError:
                     continue  # Skip malformed rows
+        evidence_entries = store.view()
     except Exception as e:
+        if not show_errors:
+            raise
         messagebox.showerror("Error", f"Failed to load data from {csv_file}:\n{str(e)}")
     return room_name, evidence_entries
 
@@ -36,6 +125,41 @@ def generate_qr_image(content):
     qr = qrcode.make(content)
     return qr
 
+def render_qr_image(content, size):
+    """
+    Render a 1-bit QR code directly at the given (width, height) size.
+
+    The box size is derived from the QR version so every module is a whole number
+    of pixels. Modules are blitted into a one-pixel-per-module image that is scaled
+    by that integer factor and centred on a white canvas, so no pixel is interpolated.
+    """
+    qr = qrcode.QRCode(border=4)
+    qr.add_data(content)
+    qr.make(fit=True)
+    count = qr.modules_count
+    border = qr.border
+    target = min(size)
+    if count + 2 * border > target:
+        border = max(0, (target - count) // 2)  # Trim the quiet zone on tiny targets
+    side = count + 2 * border
+    box_size = max(1, target // side)
+
+    pixels = bytearray(b"\xff") * (side * side)
+    for row_index, row in enumerate(qr.modules):
+        offset = (row_index + border) * side + border
+        for column_index, dark in enumerate(row):
+            if dark:
+                pixels[offset + column_index] = 0
+    image = Image.frombytes("L", (side, side), bytes(pixels)).convert("1")
+    if box_size > 1:
+        image = image.resize((side * box_size, side * box_size), Image.NEAREST)
+
+    if image.size != tuple(size):
+        canvas = Image.new("1", size, 255)
+        canvas.paste(image, ((size[0] - image.width) // 2, (size[1] - image.height) // 2))
+        image = canvas
+    return image
+
 def remove_accents(input_str):
     """
     Remove accents from a string.
@@ -43,6 +167,15 @@ def remove_accents(input_str):
     nfkd_form = unicodedata.normalize('NFKD', input_str)
     return ''.join([char for char in nfkd_form if not unicodedata.combining(char)])
 
+def fold_text(input_str):
+    """
+    Lowercase a string and remove its accents, for accent-insensitive search.
+    """
+    return remove_accents(input_str).lower()
+
+def is_listed_folder(name):
+    return name != "venv" and not name.startswith('.')
+
 # Main application class
 class InventoryApp:
     def __init__(self, root):
@@ -58,10 +191,26 @@ class InventoryApp:
         style.configure("TLabel", background="#2d2d2d", foreground="#ffffff")
         style.configure("TButton", background="#3e3e3e", foreground="#ffffff", font=("Arial", 10, "bold"), padding=5)
         style.map("TButton", background=[("active", "#4f4f4f")])
+        style.configure("TCheckbutton", background="#2d2d2d", foreground="#ffffff")
+        style.map("TCheckbutton", background=[("active", "#2d2d2d")])
 
         # Current folder path
         self.current_path = os.getcwd()  # Start in the root directory
         self.program_root = self.current_path  # Set program root directory
+        self.snapshot = None  # Open MANKO.csv.snap, browsed like a folder of rooms and owners
+        self.item_index = None  # Inventory number -> room file index over out/, loaded on the first jump
+        self.journal = None  # stocktake.Journal of the running stocktake session
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # Rendered QR codes, kept in memory and on disk across sessions
+        self.qr_cache = QRCache(render_qr_image, namespace="direct")
+        self.prefetch_pool = ThreadPoolExecutor(max_workers=2)
+        self.prefetch_futures = {}  # Entry index -> Future with the rendered PIL image
+        self.qr_size = 300  # Side of the rendered QR code, follows the window size
+        self.resize_job = None
+
+        # Jump to a scanned or typed item from any view
+        self.root.bind("<Control-j>", lambda event: self.jump_to_item())
 
         # Initialize views
         self.file_selection_view()
@@ -71,6 +220,9 @@ class InventoryApp:
             widget.destroy()
 
     def file_selection_view(self):
+        self.cancel_prefetch()
+        self.close_entries()
+        self.root.unbind("<Configure>")
         self.clear_view()
 
         # Main frame
@@ -97,15 +249,12 @@ class InventoryApp:
 
         ttk.Button(search_frame, text="Search", command=self.perform_search).pack(side=tk.LEFT, padx=5)
 
-        # Listbox with scrollbar
-        listbox_frame = ttk.Frame(main_frame)
-        listbox_frame.pack(fill=tk.BOTH, expand=True, pady=10)
-        self.file_listbox = tk.Listbox(listbox_frame, font=("Arial", 12), activestyle="none", bg="#3e3e3e", fg="#ffffff", selectbackground="#4f4f4f")
-        self.file_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.recursive_var = tk.BooleanVar(value=False)  # Search all subfolders instead of the current one
+        ttk.Checkbutton(search_frame, text="All subfolders", variable=self.recursive_var, command=self.toggle_recursive_search).pack(side=tk.LEFT, padx=5)
 
-        scrollbar = ttk.Scrollbar(listbox_frame, orient="vertical", command=self.file_listbox.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.file_listbox.config(yscrollcommand=scrollbar.set)
+        # Listbox with scrollbar; only the visible rows are materialized
+        self.file_listbox = VirtualListbox(main_frame, font=("Arial", 12), activestyle="none", bg="#3e3e3e", fg="#ffffff", selectbackground="#4f4f4f")
+        self.file_listbox.pack(fill=tk.BOTH, expand=True, pady=10)
 
         # Populate listbox
         self.refresh_file_list()
@@ -127,6 +276,9 @@ class InventoryApp:
         ttk.Button(button_frame, text="Go Back", command=self.go_back).grid(row=0, column=0, padx=10, pady=5, sticky="ew")
         ttk.Button(button_frame, text="Refresh", command=self.refresh_file_list).grid(row=1, column=0, padx=10, pady=5, sticky="ew")
         ttk.Button(button_frame, text="Open", command=self.open_file).grid(row=2, column=0, padx=10, pady=5, sticky="ew")
+        ttk.Button(button_frame, text="Jump to Item", command=self.jump_to_item).grid(row=3, column=0, padx=10, pady=5, sticky="ew")
+        stocktake_text = "Stop Stocktake" if self.journal else "Start Stocktake"
+        ttk.Button(button_frame, text=stocktake_text, command=self.toggle_stocktake).grid(row=4, column=0, padx=10, pady=5, sticky="ew")
 
         # Set initial focus to Listbox
         self.file_listbox.focus_set()
@@ -159,56 +311,103 @@ class InventoryApp:
         """
         Navigate the Listbox using the arrow keys, moving by one item at a time.
         """
-        selected = self.file_listbox.curselection()
-        if selected:
-            new_index = max(0, min(selected[0] + direction, self.file_listbox.size() - 1))
-        else:
-            new_index = 0  # If no item is selected, default to the first item
-
-        self.file_listbox.selection_clear(0, tk.END)
-        self.file_listbox.selection_set(new_index)
-        self.file_listbox.activate(new_index)
-        self.file_listbox.see(new_index)  # Ensure the item is visible
-
-        return "break"  # Prevent default Listbox behavior
+        return self.file_listbox.move(direction)  # Returns "break" to prevent default Listbox behavior
 
     def perform_search(self):
         """
         Filter the entries in the Listbox based on the search query.
+
+        Entries are matched against a lowercased, accent-folded index. When the query
+        only grows, the previous results are narrowed instead of scanning everything.
         """
-        query = self.search_var.get().lower()  # Get search input and make it case-insensitive
-        filtered_entries = [entry for entry in self.entries if query in entry.lower()]  # Filter entries
+        query = fold_text(self.search_var.get())
+        if self.recursive_var.get() and query:
+            entries, index = self.tree_search_index()
+        else:
+            entries, index = self.entries, self.entry_index
+
+        if entries is self.shown_entries and query.startswith(self.last_query):
+            candidates = self.shown
+        else:
+            candidates = range(len(entries))
+        results = [position for position in candidates if query in index[position]]
+
+        self.last_query = query
+        self.show_results(entries, results)
+
+    def toggle_recursive_search(self):
+        self.perform_search()
+        self.file_listbox.focus_set()
 
-        # Update the Listbox with filtered entries
-        self.file_listbox.delete(0, tk.END)
-        if not filtered_entries:
-            self.file_listbox.insert(tk.END, "No matching entries found.")
+    def tree_search_index(self):
+        """
+        Build (once per folder) the entries and search index of every folder and CSV file below the current path.
+        """
+        if self.snapshot is not None:
+            return self.entries, self.entry_index  # A snapshot has no subfolders
+        if self.tree_entries is None:
+            entries = []
+            for folder, folders, files in os.walk(self.current_path):
+                folders[:] = sorted(name for name in folders if is_listed_folder(name))
+                relative_folder = os.path.relpath(folder, self.current_path)
+                prefix = "" if relative_folder == "." else relative_folder.replace(os.sep, "/") + "/"
+                entries += [prefix + name for name in folders]
+                entries += [prefix + name for name in sorted(files) if name.endswith('.csv') and not name.startswith('.')]
+            self.tree_entries = entries
+            self.tree_index = [fold_text(entry) for entry in entries]
+        return self.tree_entries, self.tree_index
+
+    def show_results(self, entries, results):
+        """
+        Show entries[i] for i in results; the Listbox only draws the rows on screen.
+        """
+        self.shown_entries = entries
+        self.shown = results
+        self.showing_placeholder = not results
+        if results:
+            self.file_listbox.set_items([entries[position] for position in results])
         else:
-            for entry in filtered_entries:
-                self.file_listbox.insert(tk.END, entry)
+            self.file_listbox.set_items(["No matching entries found."], selected=None)
 
     def refresh_file_list(self):
         """
         Refresh the file list and reset search.
         """
         self.search_var.set("")  # Reset search field
-        self.file_listbox.delete(0, tk.END)
         try:
-            entries = os.listdir(self.current_path)
-            # Separate folders and files, then sort each group
-            folders = sorted([entry for entry in entries if os.path.isdir(os.path.join(self.current_path, entry)) and entry != "venv" and not entry.startswith('.')])
-            files = sorted([entry for entry in entries if entry.endswith('.csv') and not entry.startswith('.')])
+            folders = []
+            files = []
+            if self.snapshot is not None:
+                # Rooms and owners straight from the snapshot's indexes, in file order
+                files = [SNAPSHOT_ROOM + room for room in self.snapshot.room_names()]
+                files += [SNAPSHOT_OWNER + owner for owner in self.snapshot.owner_names()]
+            else:
+                # DirEntry caches the file type, so no extra stat per entry
+                with os.scandir(self.current_path) as scanner:
+                    for entry in scanner:
+                        if entry.name.startswith('.'):
+                            continue
+                        if entry.is_dir():
+                            if is_listed_folder(entry.name):
+                                folders.append(entry.name)
+                        elif entry.name.endswith(('.csv', '.snap')):
+                            files.append(entry.name)
+                files.sort()
 
             # Combine sorted folders and files
-            self.entries = folders + files
-
+            self.entries = sorted(folders) + files
+            self.entry_index = [fold_text(entry) for entry in self.entries]
+            self.tree_entries = self.tree_index = None  # Rebuilt on the next recursive search
+            self.shown_entries = self.entries
+            self.shown = list(range(len(self.entries)))
+            self.showing_placeholder = False
+            self.last_query = ""
+
+            # Auto-selects the first entry
+            self.file_listbox.set_items(self.entries)
             if not self.entries:
                 messagebox.showwarning("No Files", "No folders or CSV files found in the current directory.")
             else:
-                for entry in self.entries:
-                    self.file_listbox.insert(tk.END, entry)
-                # Auto-select the first entry and set focus
-                self.file_listbox.selection_set(0)
                 self.file_listbox.focus_set()
 
             # Update current path label with relative path
@@ -221,25 +420,26 @@ class InventoryApp:
         """
         Handle double-click to open the selected file or folder.
         """
-        selected_index = self.file_listbox.curselection()
-        if selected_index:
+        if self.file_listbox.selected is not None:
             self.open_file()  # Reuse the open_file method for consistent behavior
 
     def open_file(self):
         """
         Open a selected file or folder and reset search.
         """
-        selected_index = self.file_listbox.curselection()
-        if not selected_index:
+        selected_index = self.file_listbox.selected
+        if selected_index is None or self.showing_placeholder:
             messagebox.showwarning("No Selection", "Please select a file or folder.")
             return
 
-        selected_entry = self.entries[selected_index[0]]
+        selected_entry = self.shown_entries[self.shown[selected_index]]
         selected_path = os.path.join(self.current_path, selected_entry)
 
         self.search_var.set("")  # Reset search field on navigation
 
-        if os.path.isdir(selected_path):
+        if self.snapshot is not None:
+            self.open_snapshot_entry(selected_entry)
+        elif os.path.isdir(selected_path):
             # Navigate into the folder
             self.current_path = selected_path
             self.refresh_file_list()
@@ -248,14 +448,220 @@ class InventoryApp:
             room_name, evidence_entries = load_data(selected_path)
             if evidence_entries:
                 self.qr_code_viewer(room_name, evidence_entries)
+        elif selected_path.endswith('.snap'):
+            self.open_snapshot_file(selected_path)
         else:
             messagebox.showerror("Invalid Selection", "Please select a valid folder or CSV file.")
 
-    def qr_code_viewer(self, room_name, evidence_entries):
+    def jump_to_item(self):
+        """
+        Ask for an inventory number (typed or scanned) and open its room at that item.
+
+        With a snapshot open the room comes from its inventory number index.
+        Otherwise the lookup goes through item_index.ItemIndex over out/rooms and
+        out/names; the trees are only walked when parser.py's manifests changed
+        since the last jump, and then only changed room files are read again.
+        """
+        code = simpledialog.askstring("Jump to Item", "Inventarizační číslo:", parent=self.root)
+        if not code or not code.strip():
+            return
+        if self.snapshot is not None:
+            location = self.snapshot.find(code)
+            if location is None:
+                messagebox.showwarning("Not Found", f"Item '{code.strip()}' was not found in any room.")
+                return
+            room_path, index = location
+            evidence_entries = self.snapshot.room_entries(room_path)
+            self.qr_code_viewer(evidence_entries.title, evidence_entries, index=index)
+            return
+        try:
+            if self.item_index is None:
+                from item_index import ItemIndex  # item_index.py imports this module
+
+                out_dir = os.path.join(self.program_root, "out")
+                self.item_index = ItemIndex(os.path.join(out_dir, "rooms"), os.path.join(out_dir, "names"))
+            self.item_index.update()
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to update the item index:\n{str(e)}")
+            return
+
+        locations = self.item_index.find(code)
+        if not locations:
+            messagebox.showwarning("Not Found", f"Item '{code.strip()}' was not found in any room.")
+            return
+        room_file, row, owner = locations[0]
+        if len(locations) > 1:
+            others = "\n".join(os.path.relpath(path, self.program_root) for path, _, _ in locations[1:])
+            messagebox.showinfo("Multiple Rooms", f"Item '{code.strip()}' is also listed in:\n{others}")
+
+        room_name, evidence_entries = load_data(room_file)
+        if evidence_entries and row < len(evidence_entries):
+            self.close_snapshot()
+            self.current_path = os.path.dirname(room_file)
+            self.qr_code_viewer(room_name, evidence_entries, index=row)
+            if owner:
+                self.label_owner.config(text=owner)  # Room files leave the owner column empty
+
+    def toggle_stocktake(self):
+        """
+        Start a stocktake session writing to a journal, or stop it and offer to reconcile it against MANKO.csv.
+
+        Choosing an existing journal continues that session, e.g. after a crash.
+        """
+        import stocktake  # stocktake.py imports this module
+
+        if self.journal is None:
+            journal_path = filedialog.asksaveasfilename(
+                title="Stocktake Journal", initialdir=self.program_root, defaultextension=".jsonl",
+                initialfile=time.strftime("stocktake-%Y%m%d.jsonl"), confirmoverwrite=False,
+                filetypes=[("Stocktake journal", "*.jsonl")],
+            )
+            if not journal_path:
+                return
+            try:
+                self.journal = stocktake.Journal(journal_path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to open the journal:\n{str(e)}")
+                return
+            self.root.after(1000, self.sync_journal)
+        else:
+            journal_path = self.journal.path
+            self.journal.close()
+            self.journal = None
+            if messagebox.askyesno("Stocktake", "Reconcile the session against MANKO.csv now?"):
+                self.reconcile_journal(journal_path)
+        self.file_selection_view()
+
+    def reconcile_journal(self, journal_path):
+        import stocktake
+
+        file_path = filedialog.askopenfilename(
+            title="MANKO.csv", initialdir=self.program_root, filetypes=[("CSV files", "*.csv")]
+        )
+        if not file_path:
+            return
+        try:
+            report = stocktake.reconcile(stocktake.load_register(file_path), stocktake.read_journal(journal_path))
+            report_path = os.path.splitext(journal_path)[0] + "-report.csv"
+            stocktake.save_report(report, report_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to reconcile the stocktake:\n{str(e)}")
+            return
+        totals = {status: sum(1 for row in report if row[0] == status) for status in ("missing", "misplaced", "extra")}
+        messagebox.showinfo(
+            "Stocktake",
+            f"Missing: {totals['missing']}\nMisplaced: {totals['misplaced']}\nExtra: {totals['extra']}\n\nReport saved to {report_path}",
+        )
+
+    def sync_journal(self):
+        """
+        fsync scans that have waited too long for a full batch; runs every second during a session.
+        """
+        if self.journal is not None:
+            self.journal.sync_if_due()
+            self.root.after(1000, self.sync_journal)
+
+    def record_scan(self):
+        """
+        Log the scanned or typed code, or confirm the shown item when the scan field is empty.
+
+        The journal gets the room of the entry: in a snapshot owner view the title
+        is the owner, so the room comes from the matched or shown entry instead.
+        """
+        code = self.scan_var.get().strip()
+        source = "scan"
+        if not code:
+            if self.index == 0:
+                return "break"  # Entry 0 is the room itself
+            code, source = self.evidence_entries[self.index][0], "confirm"
+
+        folded = remove_accents(code)
+        found = self.index if source == "confirm" else None
+        for index in range(1, len(self.evidence_entries)) if found is None else ():
+            if remove_accents(self.evidence_entries[index][0]) == folded:
+                found = index
+                break
+        room = self.room_name
+        if hasattr(self.evidence_entries, "room_of"):
+            room = self.evidence_entries.room_of(self.index if found is None else found)
+            if room is None:
+                self.scan_status.config(text=f"{folded} is not listed for this owner; open an item of the room first")
+                return "break"
+
+        self.scan_var.set("")
+        try:
+            self.journal.record(room, code, source)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to write the journal:\n{str(e)}")
+            return "break"
+
+        if source == "confirm":
+            status = f"Confirmed {folded}"
+        elif found is None:
+            status = f"{folded} is not listed in this room"
+        else:
+            self.index = found
+            self.show_qr_code()
+            status = f"Scanned {folded}"
+        self.scan_status.config(text=f"{status} - {self.journal.count} scans in session")
+        return "break"
+
+    def on_close(self):
+        if self.journal is not None:
+            self.journal.close()
+        self.root.destroy()
+
+    def open_snapshot_file(self, snapshot_path):
+        """
+        Open a compiled snapshot and list its rooms and owners like a folder.
+
+        When the source CSV sits next to the snapshot, a stale snapshot is compiled again first.
+        """
+        try:
+            source_path = source_path_for(snapshot_path)
+            if source_path:
+                self.snapshot = open_snapshot(source_path, snapshot_path)
+            else:
+                self.snapshot = Snapshot(snapshot_path)
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to open snapshot {snapshot_path}:\n{str(e)}")
+            return
+        self.current_path = snapshot_path
+        self.refresh_file_list()
+
+    def open_snapshot_entry(self, entry):
+        """
+        Show the QR codes of a room or owner listed in the open snapshot; the lookup is a hash probe.
+        """
+        if entry.startswith(SNAPSHOT_ROOM):
+            evidence_entries = self.snapshot.room_entries(entry[len(SNAPSHOT_ROOM):])
+        else:
+            evidence_entries = self.snapshot.owner_entries(entry[len(SNAPSHOT_OWNER):])
+        if evidence_entries:
+            self.qr_code_viewer(evidence_entries.title, evidence_entries)
+
+    def close_snapshot(self):
+        if self.snapshot is not None:
+            self.snapshot.close()
+            self.snapshot = None
+
+    def close_entries(self):
+        """
+        Release the memory-mapped room file, if any, so it can be rewritten by parser.py.
+        """
+        if isinstance(getattr(self, "evidence_entries", None), RoomEntries):
+            self.evidence_entries.close()
+        self.evidence_entries = []
+
+    def qr_code_viewer(self, room_name, evidence_entries, index=0):
         self.clear_view()
+        # Release the room shown before (e.g. when jumping to another room) so parser.py can rewrite it
+        self.cancel_prefetch()
+        if evidence_entries is not getattr(self, "evidence_entries", None):
+            self.close_entries()
         self.room_name = room_name
         self.evidence_entries = evidence_entries
-        self.index = 0
+        self.index = index
     
         # Main frame
         main_frame = ttk.Frame(self.root, padding=10)
@@ -289,10 +695,25 @@ class InventoryApp:
         ttk.Button(button_frame, text="Menu", command=self.file_selection_view).grid(row=1, column=0, padx=10, pady=5, sticky="ew")
         ttk.Button(button_frame, text="Next", command=self.show_next).grid(row=2, column=0, padx=10, pady=5, sticky="ew")
 
+        # Stocktake session: scanners type the code followed by Enter, Enter alone confirms the shown item
+        if self.journal is not None:
+            scan_frame = ttk.Frame(main_frame)
+            scan_frame.pack(fill=tk.X, pady=5)
+            ttk.Label(scan_frame, text="Scan: ").pack(side=tk.LEFT, padx=5)
+            self.scan_var = tk.StringVar()
+            scan_entry = ttk.Entry(scan_frame, textvariable=self.scan_var)
+            scan_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+            scan_entry.bind("<Return>", lambda event: self.record_scan())
+            ttk.Button(scan_frame, text="Found", command=self.record_scan).pack(side=tk.LEFT, padx=5)
+            self.scan_status = ttk.Label(main_frame, text=f"{self.journal.count} scans in session", font=("Arial", 10))
+            self.scan_status.pack(pady=2)
+            scan_entry.focus_set()
+
         # Bind keys for navigation and menu
         self.root.bind("<Right>", lambda event: self.show_next())
         self.root.bind("<Left>", lambda event: self.show_previous())
         self.root.bind("<Escape>", lambda event: self.file_selection_view())
+        self.root.bind("<Configure>", self.on_resize)
 
         self.show_qr_code()
 
@@ -310,16 +731,97 @@ class InventoryApp:
         self.label_owner.config(text=f"{owner}")
         self.label_name.config(text=f"{name}")
 
-        # Generate QR code with normalized data
-        qr_image = generate_qr_image(normalized_code).resize((300, 300))
-        self.qr_image_tk = ImageTk.PhotoImage(qr_image)
-        self.qr_label.config(image=self.qr_image_tk)
-
         # Update position label with room name and counter (starting from 0)
         self.position_label.config(
             text=f"{self.room_name} - {self.index}/{len(self.evidence_entries) - 1}"
         )
 
+        # The QR image is rendered off the UI thread; only the PhotoImage handoff happens here
+        qr_image = self.qr_cache.peek(normalized_code, (self.qr_size, self.qr_size))
+        if qr_image is not None:
+            self.qr_image_tk = ImageTk.PhotoImage(qr_image)
+            self.qr_label.config(image=self.qr_image_tk)
+        else:
+            # Never leave the previous item's code on screen next to this item's labels
+            self.qr_image_tk = None
+            self.qr_label.config(image="")
+            self.prefetch(self.index)
+            self.display_qr_image(self.index)
+        self.prefetch_neighbours()
+
+    def render_entry(self, index):
+        """
+        Render the QR image of an entry; runs in the prefetch pool.
+        """
+        normalized_code = remove_accents(self.evidence_entries[index][0])
+        return self.qr_cache.get(normalized_code, (self.qr_size, self.qr_size))
+
+    def prefetch(self, index):
+        future = self.prefetch_futures.get(index)
+        if future is None or future.cancelled():
+            future = self.prefetch_pool.submit(self.render_entry, index)
+            self.prefetch_futures[index] = future
+        return future
+
+    def prefetch_neighbours(self):
+        """
+        Queue the next and previous entries, nearest first, and cancel work that fell out of the window.
+        """
+        low = max(0, self.index - PREFETCH_DISTANCE)
+        high = min(len(self.evidence_entries) - 1, self.index + PREFETCH_DISTANCE)
+        for index in list(self.prefetch_futures):
+            if not low <= index <= high:
+                future = self.prefetch_futures.pop(index)
+                future.cancel()  # Only stops work that has not started yet
+
+        for distance in range(1, PREFETCH_DISTANCE + 1):
+            for index in (self.index + distance, self.index - distance):
+                if low <= index <= high:
+                    self.prefetch(index)
+
+    def cancel_prefetch(self):
+        for future in self.prefetch_futures.values():
+            future.cancel()
+        self.prefetch_futures = {}
+
+    def display_qr_image(self, index):
+        """
+        Show the rendered image once it is ready; stale results are dropped.
+        """
+        if index != self.index or index not in self.prefetch_futures:
+            return  # The user has already moved on
+
+        future = self.prefetch_futures[index]
+        if not future.done():
+            self.root.after(10, self.display_qr_image, index)
+            return
+
+        try:
+            qr_image = future.result()
+        except Exception:
+            qr_image = self.render_entry(index)  # Retry on the UI thread
+        self.qr_image_tk = ImageTk.PhotoImage(qr_image)
+        self.qr_label.config(image=self.qr_image_tk)
+
+    def on_resize(self, event):
+        """
+        Re-render the QR code at a size that fits the window once resizing settles.
+        """
+        if event.widget is not self.root:
+            return
+        if self.resize_job is not None:
+            self.root.after_cancel(self.resize_job)
+        self.resize_job = self.root.after(150, self.apply_qr_size)
+
+    def apply_qr_size(self):
+        self.resize_job = None
+        # Leave room for the labels and buttons around the code
+        qr_size = max(150, min(self.root.winfo_width() - 40, self.root.winfo_height() - 400))
+        if qr_size != self.qr_size:
+            self.qr_size = qr_size
+            self.cancel_prefetch()
+            self.show_qr_code()
+
     def show_next(self):
         if self.index < len(self.evidence_entries) - 1:
             self.index += 1
@@ -334,7 +836,12 @@ class InventoryApp:
         """
         Go back to the parent directory and reset search.
         """
-        if hasattr(self, "program_root") and self.current_path != self.program_root:
+        if self.snapshot is not None:
+            self.close_snapshot()
+            self.current_path = os.path.dirname(self.current_path)
+            self.search_var.set("")
+            self.refresh_file_list()
+        elif hasattr(self, "program_root") and self.current_path != self.program_root:
             self.current_path = os.path.dirname(self.current_path)
             self.search_var.set("")  # Reset search field on navigation
             self.refresh_file_list()
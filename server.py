@@ -0,0 +1,279 @@
+import io
+import os
+import json
+import asyncio
+import hashlib
+import argparse
+from http import HTTPStatus
+from collections import OrderedDict
+from urllib.parse import unquote, urlsplit, parse_qs
+from concurrent.futures import ProcessPoolExecutor
+from item_index import scan_csv_files
+from qr_cache import QRCache
+from run import load_data, remove_accents, render_qr_image
+
+DEFAULT_QR_SIZE = 300
+MAX_QR_SIZE = 1200
+MAX_HEADER_BYTES = 16 * 1024
+
+
+def render_png(code, size):
+    """Renders a QR code to PNG bytes; runs in the encoding process pool."""
+    buffer = io.BytesIO()
+    render_qr_image(code, (size, size)).save(buffer, format="PNG", optimize=True)
+    return buffer.getvalue()
+
+
+def entries_json(evidence_entries):
+    """(Inventarizační číslo, Owner, Name) entries without the room entry, as JSON objects."""
+    items = [{"code": remove_accents(code), "owner": owner, "name": name} for code, owner, name in list(evidence_entries)[1:]]
+    if hasattr(evidence_entries, "close"):
+        evidence_entries.close()
+    return items
+
+
+def file_etag(stats):
+    """Weak ETag from (path, size, mtime_ns) tuples; changes whenever parser.py rewrites a file."""
+    digest = hashlib.sha1(repr(sorted(stats)).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:20]}"'
+
+
+class LRU(OrderedDict):
+    def __init__(self, max_items):
+        super().__init__()
+        self.max_items = max_items
+
+    def get(self, key, default=None):
+        if key not in self:
+            return default
+        self.move_to_end(key)
+        return self[key]
+
+    def put(self, key, value):
+        self[key] = value
+        self.move_to_end(key)
+        while len(self) > self.max_items:
+            self.popitem(last=False)
+
+
+class InventoryServer:
+    """
+    Minimal asyncio HTTP/1.1 server over parser.py's output trees.
+
+    GET /rooms and /owners list the room and owner files, /rooms/<room> and
+    /owners/<owner> return their items as JSON and /qr/<code>.png?size=N returns
+    a QR code. Responses carry an ETag and If-None-Match is answered with 304:
+    listings are tagged by the size and mtime of the files behind them, so a
+    304 costs a few stat calls, and QR codes by their content-addressed cache
+    key, so a 304 costs nothing. File reads run in the default thread pool and
+    QR encoding in a bounded process pool, so the event loop never blocks on
+    either. Rendered PNGs go through the viewer's QRCache disk store.
+    """
+
+    def __init__(self, rooms_dir="out/rooms", names_dir="out/names", jobs=None, cache_dir=None):
+        self.rooms_dir = rooms_dir
+        self.names_dir = names_dir
+        self.jobs = jobs or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(max_workers=self.jobs)
+        self.render_slots = asyncio.Semaphore(2 * self.jobs)  # Renders queued in the pool at most
+        self.rendering = {}  # Cache key -> future of a render in progress, shared by concurrent requests
+        self.qr_cache = QRCache(render_qr_image, cache_dir=cache_dir, namespace="direct")
+        self.png_cache = LRU(1024)  # Cache key -> PNG bytes
+        self.json_cache = LRU(256)  # (route, ETag) -> JSON bytes
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                except ValueError:
+                    await self.respond(writer, HTTPStatus.BAD_REQUEST, b"", close=True)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    name, _, value = line.partition(":")
+                    if name:
+                        headers[name.strip().lower()] = value.strip()
+                if headers.get("content-length", "0") != "0":
+                    await self.respond(writer, HTTPStatus.METHOD_NOT_ALLOWED, b"", close=True)
+                    break
+                close = headers.get("connection", "").lower() == "close" or version == "HTTP/1.0"
+
+                if method not in ("GET", "HEAD"):
+                    status, response_headers, body = HTTPStatus.METHOD_NOT_ALLOWED, {"Allow": "GET, HEAD"}, b""
+                else:
+                    try:
+                        status, response_headers, body = await self.route(target, headers)
+                    except Exception as e:
+                        print(f"Error serving {target}: {e}")
+                        status, response_headers, body = HTTPStatus.INTERNAL_SERVER_ERROR, {}, b""
+                await self.respond(writer, status, body, response_headers, close, head_only=method == "HEAD")
+                if close:
+                    break
+        finally:
+            writer.close()
+
+    async def respond(self, writer, status, body, headers=None, close=False, head_only=False):
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Content-Length: {len(body)}"]
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        if close:
+            lines.append("Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+        if not head_only:
+            writer.write(body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def route(self, target, headers):
+        url = urlsplit(target)
+        parts = [unquote(part) for part in url.path.split("/") if part]
+        if any(part in (".", "..") or "\\" in part for part in parts):
+            return HTTPStatus.NOT_FOUND, {}, b""
+
+        if parts and parts[0] == "qr" and len(parts) == 2 and parts[1].endswith(".png"):
+            size = parse_qs(url.query).get("size", [DEFAULT_QR_SIZE])[0]
+            try:
+                size = max(50, min(int(size), MAX_QR_SIZE))
+            except ValueError:
+                return HTTPStatus.BAD_REQUEST, {}, b""
+            return await self.qr(parts[1][:-len(".png")], size, headers)
+
+        loop = asyncio.get_running_loop()
+        if parts == ["rooms"]:
+            build = self.room_listing
+        elif parts == ["owners"]:
+            build = self.owner_listing
+        elif len(parts) > 1 and parts[0] == "rooms":
+            build = lambda: self.room_items("/".join(parts[1:]))  # noqa: E731
+        elif len(parts) == 2 and parts[0] == "owners":
+            build = lambda: self.owner_items(parts[1])  # noqa: E731
+        else:
+            return HTTPStatus.NOT_FOUND, {}, b""
+
+        # The ETag comes from stat calls only, so a 304 never reads or parses a file
+        found, etag, compute = await loop.run_in_executor(None, build)
+        if not found:
+            return HTTPStatus.NOT_FOUND, {}, b""
+        response_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if etag in headers.get("if-none-match", ""):
+            return HTTPStatus.NOT_MODIFIED, response_headers, b""
+        body = self.json_cache.get((url.path, etag))
+        if body is None:
+            body = await loop.run_in_executor(None, lambda: json.dumps(compute(), ensure_ascii=False).encode("utf-8"))
+            self.json_cache.put((url.path, etag), body)
+        response_headers["Content-Type"] = "application/json; charset=utf-8"
+        return HTTPStatus.OK, response_headers, body
+
+    def room_listing(self):
+        files = sorted(scan_csv_files(self.rooms_dir))
+        stats = [(path, stat.st_size, stat.st_mtime_ns) for path, stat in ((path, entry.stat()) for path, entry in files)]
+        return True, file_etag(stats), lambda: {"rooms": [path[:-len(".csv")] for path, _ in files]}
+
+    def owner_listing(self):
+        try:
+            with os.scandir(self.names_dir) as scanner:
+                owners = sorted(entry.name for entry in scanner if entry.is_dir() and not entry.name.startswith("."))
+        except FileNotFoundError:
+            owners = []
+        return True, file_etag([(owner, 0, 0) for owner in owners]), lambda: {"owners": owners}
+
+    def room_items(self, room):
+        path = os.path.join(self.rooms_dir, *room.split("/")) + ".csv"
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False, None, None
+
+        def compute():
+            room_name, evidence_entries = load_data(path, show_errors=False)
+            return {"room": room_name, "items": entries_json(evidence_entries)}
+
+        return True, file_etag([(room, stat.st_size, stat.st_mtime_ns)]), compute
+
+    def owner_items(self, owner):
+        owner_dir = os.path.join(self.names_dir, owner)
+        if not os.path.isdir(owner_dir):
+            return False, None, None
+        files = sorted(scan_csv_files(owner_dir))
+        stats = [(path, stat.st_size, stat.st_mtime_ns) for path, stat in ((path, entry.stat()) for path, entry in files)]
+
+        def compute():
+            rooms = {}
+            for path, entry in files:
+                room_name, evidence_entries = load_data(entry.path, show_errors=False)
+                rooms[room_name] = entries_json(evidence_entries)
+            return {"owner": owner, "rooms": rooms}
+
+        return True, file_etag(stats), compute
+
+    async def qr(self, code, size, headers):
+        code = remove_accents(code)
+        key = self.qr_cache.key(code, (size, size))
+        response_headers = {"ETag": f'"{key}"', "Cache-Control": "public, max-age=86400"}
+        if f'"{key}"' in headers.get("if-none-match", ""):
+            return HTTPStatus.NOT_MODIFIED, response_headers, b""
+
+        body = self.png_cache.get(key)
+        if body is None:
+            loop = asyncio.get_running_loop()
+            body = await loop.run_in_executor(None, self.qr_cache.load_png, key)
+            if body is None:
+                body = await self.render(key, code, size)
+            self.png_cache.put(key, body)
+        response_headers["Content-Type"] = "image/png"
+        return HTTPStatus.OK, response_headers, body
+
+    async def render(self, key, code, size):
+        """Encodes a QR code in the process pool; concurrent requests for one code share the render."""
+        pending = self.rendering.get(key)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        loop = asyncio.get_running_loop()
+        pending = self.rendering[key] = loop.create_future()
+        try:
+            async with self.render_slots:
+                body = await loop.run_in_executor(self.pool, render_png, code, size)
+            await loop.run_in_executor(None, self.qr_cache.store_png, key, body)
+            pending.set_result(body)
+            return body
+        except asyncio.CancelledError:
+            pending.cancel()
+            raise
+        except Exception as e:
+            pending.set_exception(e)
+            pending.exception()  # Mark as retrieved when nobody else waits for it
+            raise
+        finally:
+            del self.rendering[key]
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        print(f"Serving '{self.rooms_dir}' and '{self.names_dir}' on http://{host}:{port}/ with {self.jobs} QR workers")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve rooms, owners and QR codes over HTTP on the local network.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--rooms-dir", default="out/rooms")
+    parser.add_argument("--names-dir", default="out/names")
+    parser.add_argument("--jobs", type=int, default=None, help="QR encoding processes (default: CPU count)")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(InventoryServer(args.rooms_dir, args.names_dir, args.jobs).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,473 @@
+import os
+import sys
+import mmap
+import struct
+import zlib
+import unicodedata
+import hashlib
+import bisect
+import argparse
+from array import array
+from records import RecordStore, RecordView
+
+MAGIC = b"MANKOSNP"
+VERSION = 2
+HEADER = struct.Struct("<8sIQQ32sI")  # magic, version, source size, source mtime_ns, source sha256, section count
+MTIME = struct.Struct("<Q")
+MTIME_OFFSET = struct.calcsize("<8sIQ")  # Where the source mtime_ns sits in the header
+SECTION = struct.Struct("<8sQQ")  # name, offset, length
+LOCATION_SEPARATOR = "\x1f"
+
+
+def snapshot_path_for(csv_path):
+    return csv_path + ".snap"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, mode="rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.digest()
+
+
+def fold_code(code):
+    """
+    Folds an inventory number the way the viewer encodes it into QR codes, like
+    run.remove_accents (run.py imports this module, so it is not imported here).
+    """
+    nfkd_form = unicodedata.normalize("NFKD", code.strip())
+    return "".join(char for char in nfkd_form if not unicodedata.combining(char))
+
+
+def little_endian(values):
+    """Returns the bytes of an array in little-endian order, whatever the host order."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def hash_slots(keys):
+    """Builds an open-addressing table (array of id + 1, 0 = empty) for a list of byte keys."""
+    size = 8
+    while size < 2 * len(keys):
+        size *= 2
+    slots = array("I", bytes(4 * size))
+    for key_id, key in enumerate(keys):
+        slot = zlib.crc32(key) & (size - 1)
+        while slots[slot]:
+            slot = (slot + 1) & (size - 1)
+        slots[slot] = key_id + 1
+    return slots
+
+
+def pack_strings(values):
+    """Returns (data, ends) for a list of strings, the same layout as records.StringTable."""
+    data = bytearray()
+    ends = array("Q")
+    for value in values:
+        data += value.encode("utf-8")
+        ends.append(len(data))
+    return bytes(data), ends
+
+
+def location_text(main_key, sub_keys):
+    return LOCATION_SEPARATOR.join((main_key, *sub_keys))
+
+
+def write_snapshot(store, detected_owners, snapshot_path, source_path):
+    """
+    Writes a RecordStore and its room, owner and inventory-number indexes to snapshot_path.
+
+    Every section is a flat little-endian array or a UTF-8 blob aligned to 8 bytes,
+    so a reader can memory-map the file and use the arrays in place (on
+    little-endian hosts; big-endian ones read byte-swapped copies).
+    """
+    sections = {}
+
+    def add_strings(name, values):
+        sections[name + "_d"], sections[name + "_e"] = pack_strings(values)
+
+    sections["loc_ids"] = store.location_ids
+    sections["own_ids"] = store.owner_ids
+    sections["inrooms"] = bytes(store.in_rooms)
+    sections["inv_d"], sections["inv_e"] = bytes(store.inventory_numbers.data), store.inventory_numbers.ends
+    sections["nam_d"], sections["nam_e"] = bytes(store.names.data), store.names.ends
+    locations = [location_text(*location) for location in store.locations.values]
+    owners = [owner or "" for owner in store.owners.values]
+    add_strings("loc", locations)
+    add_strings("own", owners)
+    add_strings("hdr", detected_owners)
+
+    # Room output: records grouped by location in file order, plus a name -> group hash
+    room_order = array("I")
+    room_groups = array("I")  # (location id, start, end) per room
+    for (main_key, sub_keys), indices in store.room_groups():
+        room_groups.extend((store.locations.ids[(main_key, sub_keys)], len(room_order), len(room_order) + len(indices)))
+        room_order.extend(indices)
+    sections["room_ord"] = room_order
+    sections["room_grp"] = room_groups
+    sections["room_hsh"] = hash_slots([locations[room_groups[group * 3]].encode("utf-8") for group in range(len(room_groups) // 3)])
+
+    # Owner output: (owner, location) groups in file order, and per owner the range of its groups
+    owner_order = array("I")
+    owner_groups = array("I")  # (owner id, location id, start, end) per group
+    for (owner, main_key, sub_keys), indices in store.owner_groups():
+        owner_groups.extend((store.owners.ids[owner], store.locations.ids[(main_key, sub_keys)], len(owner_order), len(owner_order) + len(indices)))
+        owner_order.extend(indices)
+    group_count = len(owner_groups) // 4
+    by_owner = sorted(range(group_count), key=lambda group: owner_groups[group * 4])
+    owner_ranges = array("I", bytes(8 * len(owners)))  # (first, end) into own_gix per owner id
+    for position, group in enumerate(by_owner):
+        owner_id = owner_groups[group * 4]
+        if owner_ranges[owner_id * 2 + 1] == 0:
+            owner_ranges[owner_id * 2] = position
+        owner_ranges[owner_id * 2 + 1] = position + 1
+    sections["ownr_ord"] = owner_order
+    sections["ownr_grp"] = owner_groups
+    sections["own_gix"] = array("I", by_owner)
+    sections["own_rng"] = owner_ranges
+    sections["own_hsh"] = hash_slots([owner.encode("utf-8") for owner in owners])
+
+    # Folded inventory number -> (room group, entry index) of its first room item
+    first_items = {}
+    for group in range(len(room_groups) // 3):
+        _, start, end = room_groups[group * 3:group * 3 + 3]
+        for position in range(start, end):
+            first_items.setdefault(fold_code(store.inventory_numbers[room_order[position]]), (group, position - start + 1))
+    inventory_keys = list(first_items)
+    sections["inv_loc"] = array("I", (value for location in first_items.values() for value in location))
+    sections["inv_hsh"] = hash_slots([key.encode("utf-8") for key in inventory_keys])
+    add_strings("invk", inventory_keys)
+
+    stat = os.stat(source_path)
+    offset = HEADER.size + SECTION.size * len(sections)
+    table = []
+    blobs = []
+    for name, value in sections.items():
+        blob = little_endian(value) if isinstance(value, array) else bytes(value)
+        offset += -offset % 8
+        table.append(SECTION.pack(name.encode("ascii"), offset, len(blob)))
+        blobs.append((offset, blob))
+        offset += len(blob)
+
+    temp_path = snapshot_path + ".tmp"
+    with open(temp_path, mode="wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, stat.st_size, stat.st_mtime_ns, file_sha256(source_path), len(sections)))
+        f.write(b"".join(table))
+        for blob_offset, blob in blobs:
+            f.write(b"\0" * (blob_offset - f.tell()))
+            f.write(blob)
+    os.replace(temp_path, snapshot_path)
+
+
+class MappedStrings:
+    """Read-only string table over a memory-mapped blob and its end offsets."""
+
+    def __init__(self, data, ends):
+        self.data = data
+        self.ends = ends
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __getitem__(self, index):
+        start = self.ends[index - 1] if index > 0 else 0
+        return bytes(self.data[start:self.ends[index]]).decode("utf-8")
+
+
+class OrderSlice:
+    """Window of a mapped index array; unlike a memoryview slice it does not pin the map."""
+
+    def __init__(self, order, start, end):
+        self.order = order
+        self.start = start
+        self.end = end
+
+    def __len__(self):
+        return self.end - self.start
+
+    def __getitem__(self, position):
+        if not 0 <= position < self.end - self.start:
+            raise IndexError(position)
+        return self.order[self.start + position]
+
+
+class SnapshotEntries:
+    """
+    (Inventarizační číslo, Owner, Name) entries of a room or an owner, read from a
+    snapshot. Entry 0 is the title itself, like in run.load_data. rooms holds the
+    room path of every view; it is None for a room, whose title is its path.
+    """
+
+    def __init__(self, title, views, rooms=None):
+        self.title = title
+        self.views = views
+        self.rooms = rooms
+        self.starts = []  # First entry index of every view
+        total = 1
+        for view in views:
+            self.starts.append(total)
+            total += len(view)
+        self.total = total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.total
+        if index == 0:
+            return (self.title, self.title, self.title)
+        if not 0 < index < self.total:
+            raise IndexError("snapshot entry index out of range")
+        view = bisect.bisect_right(self.starts, index) - 1
+        return self.views[view][index - self.starts[view]]
+
+    def room_of(self, index):
+        """Returns the room path of an entry, or None for the title entry of an owner."""
+        if self.rooms is None:
+            return self.title
+        if not 0 < index < self.total:
+            return None
+        return self.rooms[bisect.bisect_right(self.starts, index) - 1]
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class Snapshot:
+    """
+    Memory-mapped compiled register.
+
+    Exposes the same column attributes as RecordStore (owners, owner_ids,
+    inventory_numbers, names), so RecordView works on top of it. Rooms, owners
+    and inventory numbers are found through on-disk hash tables without loading
+    anything else.
+    """
+
+    def __init__(self, snapshot_path):
+        self.path = snapshot_path
+        self.file = open(snapshot_path, mode="rb")
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"{snapshot_path} is empty")
+
+        # A truncated or corrupt file must not keep the map open: open_snapshot replaces it next
+        self.views = []  # Every memoryview over the map, released before the map is closed
+        try:
+            self.load()
+        except (struct.error, KeyError, TypeError, IndexError) as e:
+            self.close()
+            raise ValueError(f"{snapshot_path} is not a valid snapshot ({e!r})") from e
+        except BaseException:
+            self.close()
+            raise
+
+    def load(self):
+        magic, version, self.source_size, self.source_mtime_ns, self.source_sha256, count = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} snapshot")
+
+        view = self.track(memoryview(self.mm))
+        self.sections = {}
+        for position in range(count):
+            name, offset, length = SECTION.unpack_from(self.mm, HEADER.size + position * SECTION.size)
+            if offset + length > len(self.mm):
+                raise ValueError(f"{self.path} is truncated")
+            self.sections[name.rstrip(b"\0").decode("ascii")] = self.track(view[offset:offset + length])
+
+        self.location_ids = self.array("loc_ids")
+        self.owner_ids = self.array("own_ids")
+        self.in_rooms = self.sections["inrooms"]
+        self.inventory_numbers = self.strings("inv")
+        self.names = self.strings("nam")
+        self.locations = self.strings("loc")
+        self.owners = self.strings("own")
+        self.detected_owners = self.strings("hdr")
+        self.room_order = self.array("room_ord")
+        self.room_groups = self.array("room_grp")
+        self.owner_order = self.array("ownr_ord")
+        self.owner_groups = self.array("ownr_grp")
+        self.owner_group_index = self.array("own_gix")
+        self.owner_ranges = self.array("own_rng")
+        self.inventory_locations = self.array("inv_loc")
+        self.inventory_keys = self.strings("invk")
+        self.room_slots = self.array("room_hsh")
+        self.owner_slots = self.array("own_hsh")
+        self.inventory_slots = self.array("inv_hsh")
+
+    def __len__(self):
+        return len(self.location_ids)
+
+    def track(self, view):
+        self.views.append(view)
+        return view
+
+    def array(self, name, typecode="I"):
+        if sys.byteorder == "big":
+            values = array(typecode, self.sections[name])  # The sections are little-endian
+            values.byteswap()
+            return values
+        return self.track(self.sections[name].cast(typecode))
+
+    def strings(self, name):
+        return MappedStrings(self.sections[name + "_d"], self.array(name + "_e", "Q"))
+
+    def close(self):
+        for view in reversed(getattr(self, "views", [])):
+            view.release()
+        self.mm.close()
+        self.file.close()
+
+    def lookup(self, slots, key, key_at):
+        """Probes an on-disk hash table; returns the id stored for key or None."""
+        mask = len(slots) - 1
+        slot = zlib.crc32(key.encode("utf-8")) & mask
+        while slots[slot]:
+            key_id = slots[slot] - 1
+            if key_at(key_id) == key:
+                return key_id
+            slot = (slot + 1) & mask
+        return None
+
+    def is_fresh(self, source_path):
+        """
+        Checks the snapshot against its source CSV: size first, then mtime, then content hash.
+
+        When only the mtime changed (e.g. the export was copied again), the new
+        mtime is written into the header, so the next check skips the hash.
+        """
+        try:
+            stat = os.stat(source_path)
+        except FileNotFoundError:
+            return False
+        if stat.st_size != self.source_size:
+            return False
+        if stat.st_mtime_ns == self.source_mtime_ns:
+            return True
+        if file_sha256(source_path) != self.source_sha256:
+            return False
+        try:
+            with open(self.path, mode="r+b") as f:
+                f.seek(MTIME_OFFSET)
+                f.write(MTIME.pack(stat.st_mtime_ns))
+            self.source_mtime_ns = stat.st_mtime_ns
+        except OSError:
+            pass  # A read-only snapshot is still fresh, it is just hashed every time
+        return True
+
+    def room_names(self):
+        """Returns the room paths ("main/sub/room") in file order."""
+        return [self.locations[self.room_groups[group * 3]].replace(LOCATION_SEPARATOR, "/") for group in range(len(self.room_groups) // 3)]
+
+    def owner_names(self):
+        return [self.owners[owner_id] for owner_id in range(1, len(self.owners)) if self.owner_ranges[owner_id * 2 + 1]]
+
+    def room(self, room_path):
+        """Returns the (Inventarizační číslo, "", Name) entries of a room, or None."""
+        group = self.lookup(self.room_slots, room_path.replace("/", LOCATION_SEPARATOR), lambda group: self.locations[self.room_groups[group * 3]])
+        if group is None:
+            return None
+        _, start, end = self.room_groups[group * 3:group * 3 + 3]
+        return RecordView(self, OrderSlice(self.room_order, start, end), owner="")
+
+    def owner_rooms(self, owner):
+        """Returns [(room path, entries)] for every room of an owner, or None."""
+        owner_id = self.lookup(self.owner_slots, owner, lambda owner_id: self.owners[owner_id])
+        if owner_id is None:
+            return None
+        rooms = []
+        first, end = self.owner_ranges[owner_id * 2:owner_id * 2 + 2]
+        for position in range(first, end):
+            group = self.owner_group_index[position]
+            _, location_id, start, stop = self.owner_groups[group * 4:group * 4 + 4]
+            rooms.append((self.locations[location_id].replace(LOCATION_SEPARATOR, "/"), RecordView(self, OrderSlice(self.owner_order, start, stop))))
+        return rooms
+
+    def room_entries(self, room_path):
+        entries = self.room(room_path)
+        return None if entries is None else SnapshotEntries(room_path, [entries])
+
+    def owner_entries(self, owner):
+        rooms = self.owner_rooms(owner)
+        if rooms is None:
+            return None
+        return SnapshotEntries(owner, [entries for _, entries in rooms], [room_path for room_path, _ in rooms])
+
+    def find(self, inventory_number):
+        """
+        Returns (room path, entry index) of the first room item with an inventory
+        number, or None. The number is folded like the QR codes, so a scanned code
+        matches an accented one; the entry index fits room_entries(room path).
+        """
+        key_id = self.lookup(self.inventory_slots, fold_code(inventory_number), lambda key_id: self.inventory_keys[key_id])
+        if key_id is None:
+            return None
+        group, index = self.inventory_locations[key_id * 2], self.inventory_locations[key_id * 2 + 1]
+        return self.locations[self.room_groups[group * 3]].replace(LOCATION_SEPARATOR, "/"), index
+
+    def iter_items(self):
+        """Yields the items group by group, in the same order as parser.iter_items_parallel."""
+        for group in range(len(self.room_groups) // 3):
+            location_id, start, end = self.room_groups[group * 3:group * 3 + 3]
+            main_key, *sub_keys = self.locations[location_id].split(LOCATION_SEPARATOR)
+            for index in OrderSlice(self.room_order, start, end):
+                yield main_key, tuple(sub_keys), self.inventory_numbers[index], self.names[index], True, None
+        for group in range(len(self.owner_groups) // 4):
+            owner_id, location_id, start, end = self.owner_groups[group * 4:group * 4 + 4]
+            owner = self.owners[owner_id]
+            main_key, *sub_keys = self.locations[location_id].split(LOCATION_SEPARATOR)
+            for index in OrderSlice(self.owner_order, start, end):
+                yield main_key, tuple(sub_keys), self.inventory_numbers[index], self.names[index], False, owner
+
+
+def compile_snapshot(csv_path, snapshot_path=None, jobs=1):
+    """Parses a MANKO.csv export and writes its snapshot; returns the snapshot path."""
+    import parser as manko  # parser.py imports this module lazily for --snapshot
+
+    snapshot_path = snapshot_path or snapshot_path_for(csv_path)
+    store = RecordStore()
+    detected_owners = []
+    for item in manko.iter_file_items(csv_path, jobs, on_owner=detected_owners.append):
+        store.append(*item)
+    write_snapshot(store, detected_owners, snapshot_path, csv_path)
+    return snapshot_path
+
+
+def source_path_for(snapshot_path):
+    """Returns the CSV a snapshot was compiled from, when it sits next to it."""
+    source_path = snapshot_path[:-len(".snap")]
+    return source_path if snapshot_path.endswith(".snap") and os.path.isfile(source_path) else None
+
+
+def open_snapshot(csv_path, snapshot_path=None, jobs=1):
+    """
+    Opens the snapshot of a MANKO.csv export, compiling it first when it is
+    missing or when the source CSV's size, mtime or hash no longer match.
+    """
+    snapshot_path = snapshot_path or snapshot_path_for(csv_path)
+    try:
+        snapshot = Snapshot(snapshot_path)
+        if snapshot.is_fresh(csv_path):
+            return snapshot
+        snapshot.close()
+    except (FileNotFoundError, ValueError, struct.error, KeyError):
+        pass
+    compile_snapshot(csv_path, snapshot_path, jobs)
+    return Snapshot(snapshot_path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compile a MANKO.csv export into a memory-mappable snapshot.")
+    parser.add_argument("file_path", nargs="?", default="MANKO.csv", help="path to the CSV file")
+    parser.add_argument("-o", "--output", default=None, help="snapshot path (default: <file_path>.snap)")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes (default: 1)")
+    args = parser.parse_args()
+
+    path = compile_snapshot(args.file_path, args.output, args.jobs)
+    print(f"Snapshot of '{args.file_path}' saved to '{path}'.")
@@ -0,0 +1,177 @@
+import os
+import csv
+import json
+import time
+import argparse
+from collections import defaultdict
+import parser as manko
+from run import remove_accents
+
+JOURNAL_BATCH = 32  # Scans per fsync
+JOURNAL_INTERVAL = 2.0  # Seconds before pending scans are fsynced anyway
+
+
+class Journal:
+    """
+    Append-only stocktake journal, one JSON object per line.
+
+    Every scan is written and flushed to the OS right away, so a crash of the
+    viewer loses nothing; fsync, which is what survives a power cut, is batched
+    to every JOURNAL_BATCH scans or JOURNAL_INTERVAL seconds. Reopening an
+    existing journal continues the session.
+    """
+
+    def __init__(self, path, batch=JOURNAL_BATCH, interval=JOURNAL_INTERVAL):
+        self.path = path
+        self.batch = batch
+        self.interval = interval
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.count = len(read_journal(path)) if os.path.exists(path) else 0
+        repair_journal(path)
+        self.file = open(path, mode="a", encoding="utf-8")
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def record(self, room, code, source="scan"):
+        entry = {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "room": room, "code": remove_accents(code.strip()), "source": source}
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+        self.count += 1
+        self.pending += 1
+        if self.pending >= self.batch:
+            self.sync()
+
+    def sync_if_due(self):
+        if self.pending and time.monotonic() - self.last_sync >= self.interval:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        if not self.file.closed:
+            self.sync()
+            self.file.close()
+
+
+def repair_journal(path):
+    """Cuts off a line torn by a crash mid-write, so new scans start on a fresh line."""
+    try:
+        with open(path, mode="rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+    except FileNotFoundError:
+        pass
+
+
+def read_journal(path):
+    """Returns the (room, code) scans of a journal; a torn last line is skipped."""
+    scans = []
+    with open(path, mode="r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            if not line.endswith("\n"):
+                break
+            try:
+                entry = json.loads(line)
+                scans.append((entry["room"], entry["code"]))
+            except (ValueError, KeyError, TypeError):
+                continue
+    return scans
+
+
+def load_register(file_path, jobs=1, snapshot=False):
+    """
+    Builds the hash side of the join from MANKO.csv.
+
+    Returns (rooms, owners, names): folded code -> set of rooms it belongs to,
+    (code, room) -> owner and code -> item name.
+    """
+    rooms = defaultdict(set)
+    owners = {}
+    names = {}
+    for main_key, sub_keys, inventarni_cislo, nazev, in_rooms, owner in manko.iter_file_items(file_path, jobs, snapshot=snapshot):
+        code = remove_accents(inventarni_cislo)
+        room = "/".join((main_key, *sub_keys))
+        rooms[code].add(room)
+        names.setdefault(code, nazev)
+        if owner:
+            owners.setdefault((code, room), owner)
+    return rooms, owners, names
+
+
+def reconcile(register, scans, all_rooms=False):
+    """
+    Diffs the scans against the register with set operations and dict lookups.
+
+    Returns a list of (status, room, owner, code, name, found_in) rows, where status is
+    "missing" (expected in room but not scanned anywhere), "misplaced" (expected in
+    room but scanned in found_in) or "extra" (scanned in room but not in the
+    register). Missing items are only reported for rooms visited in the session,
+    unless all_rooms is set.
+    """
+    rooms, owners, names = register
+    found = defaultdict(set)  # Code -> rooms it was scanned in
+    for room, code in scans:
+        found[code].add(room)
+    visited = {room for room, _ in scans}
+
+    report = []
+    for code in rooms.keys() - found.keys():
+        for room in rooms[code]:
+            if all_rooms or room in visited:
+                report.append(("missing", room, owners.get((code, room), ""), code, names[code], ""))
+    for code in rooms.keys() & found.keys():
+        expected = rooms[code]
+        for found_in in found[code] - expected:
+            for room in expected:
+                report.append(("misplaced", room, owners.get((code, room), ""), code, names[code], found_in))
+    for code in found.keys() - rooms.keys():
+        for room in found[code]:
+            report.append(("extra", room, "", code, "", room))
+
+    report.sort(key=lambda row: (row[1], row[2], row[0], row[3]))
+    return report
+
+
+def print_report(report):
+    counts = defaultdict(lambda: defaultdict(int))
+    for status, room, owner, _, _, _ in report:
+        counts[(room, owner)][status] += 1
+
+    print("\nReconciliation by room and owner:")
+    for (room, owner), statuses in counts.items():
+        summary = ", ".join(f"{count} {status}" for status, count in sorted(statuses.items()))
+        print(f"{room}" + (f" ({owner})" if owner else "") + f": {summary}")
+
+    totals = defaultdict(int)
+    for row in report:
+        totals[row[0]] += 1
+    print(f"\nMissing: {totals['missing']}, misplaced: {totals['misplaced']}, extra: {totals['extra']}")
+
+
+def save_report(report, output):
+    with open(output, mode="w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["Status", "Místnost", "Odpovědná osoba", "Inventarizační číslo", "Název", "Nalezeno v"])
+        writer.writerows(report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reconcile a stocktake journal against MANKO.csv.")
+    parser.add_argument("journal", help="stocktake journal written by the viewer")
+    parser.add_argument("file_path", nargs="?", default="MANKO.csv", help="path to the CSV file")
+    parser.add_argument("-o", "--output", default=None, help="save the report as CSV")
+    parser.add_argument("--all-rooms", action="store_true", help="report missing items of rooms not visited in the session too")
+    parser.add_argument("--jobs", type=int, default=1, help="number of worker processes (default: 1)")
+    parser.add_argument("--snapshot", action="store_true", help="read the register from the compiled <file_path>.snap snapshot")
+    args = parser.parse_args()
+
+    report = reconcile(load_register(args.file_path, args.jobs, args.snapshot), read_journal(args.journal), args.all_rooms)
+    print_report(report)
+    if args.output:
+        save_report(report, args.output)
+        print(f"Report saved to '{args.output}'.")
@@ -0,0 +1,51 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import item_index  # noqa: E402
+import parser as manko  # noqa: E402
+from synthetic import write_manko  # noqa: E402
+
+
+def build(tmp_path, seed=0):
+    manko_path = str(tmp_path / "MANKO.csv")
+    write_manko(manko_path, rows=2000, owners=10, rooms=50, seed=seed)
+    rooms_dir, names_dir = str(tmp_path / "rooms"), str(tmp_path / "names")
+    manko.process_and_save(manko_path, rooms_dir, names_dir)
+    return rooms_dir, names_dir
+
+
+def test_update_skips_the_walk_while_the_manifests_are_unchanged(tmp_path, monkeypatch):
+    rooms_dir, names_dir = build(tmp_path)
+    index = item_index.ItemIndex(rooms_dir, names_dir)
+    read, dropped = index.update()
+    assert read > 0 and dropped == 0
+
+    def no_walk(base_dir):
+        raise AssertionError(f"walked {base_dir}")
+
+    walk = item_index.scan_csv_files
+    monkeypatch.setattr(item_index, "scan_csv_files", no_walk)
+    assert item_index.ItemIndex(rooms_dir, names_dir).update() == (0, 0)
+
+    build(tmp_path)  # Same input: the manifests are saved again with the same content
+    assert item_index.ItemIndex(rooms_dir, names_dir).update() == (0, 0)
+
+    monkeypatch.setattr(item_index, "scan_csv_files", walk)
+    build(tmp_path, seed=1)
+    index = item_index.ItemIndex(rooms_dir, names_dir)
+    read, _ = index.update()
+    assert read > 0
+    assert len(index.files["rooms"]) == len(manko.load_manifest(rooms_dir))
+
+
+def test_update_walks_without_a_manifest(tmp_path):
+    rooms_dir, names_dir = build(tmp_path)
+    index = item_index.ItemIndex(rooms_dir, names_dir)
+    index.update()
+    os.remove(os.path.join(rooms_dir, item_index.MANIFEST_NAME))
+    room_file = os.path.join(rooms_dir, *next(iter(index.files["rooms"])).split("/"))
+    os.remove(room_file)
+    assert item_index.ItemIndex(rooms_dir, names_dir).update() == (0, 1)
@@ -0,0 +1,64 @@
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import PdfParser  # noqa: E402
+
+from labels import export_labels, iter_labels  # noqa: E402
+
+COLUMNS, ROWS = 3, 8
+
+
+def write_room(path, labels):
+    with open(path, mode="w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, delimiter=";")
+        writer.writerow(["B1/2/2.14", "Místnost: B1/2/2.14", ""])
+        for index in range(labels - 1):  # The room itself is the first label
+            writer.writerow([f"{index:09d}", "Jan Novák", f"Židle {index}"])
+
+
+def export_pdf(tmp_path, pages):
+    room_file = tmp_path / f"room_{pages}.csv"
+    output = tmp_path / f"labels_{pages}.pdf"
+    write_room(room_file, pages * COLUMNS * ROWS)
+    written, labels = export_labels(str(room_file), str(output), dpi=50, columns=COLUMNS, rows=ROWS, jobs=1)
+    assert (written, labels) == (pages, pages * COLUMNS * ROWS)
+    return output
+
+
+def test_pdf_has_one_page_object_per_page(tmp_path):
+    output = export_pdf(tmp_path, 5)
+    assert len(PdfParser.PdfParser(str(output)).pages) == 5
+    assert output.read_bytes().count(b"/Type /Page ") == 5
+
+
+def test_pdf_size_grows_linearly(tmp_path):
+    small = os.path.getsize(export_pdf(tmp_path, 2))
+    large = os.path.getsize(export_pdf(tmp_path, 8))
+    assert 3 < large / small < 5
+
+
+def test_room_labels_carry_the_owner(tmp_path):
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+    import parser as manko
+    from synthetic import write_manko
+
+    manko_path = str(tmp_path / "MANKO.csv")
+    write_manko(manko_path, rows=300, owners=4, rooms=10)
+    rooms_dir, names_dir = tmp_path / "out" / "rooms", tmp_path / "out" / "names"
+    manko.process_and_save(manko_path, str(rooms_dir), str(names_dir), incremental=False)
+    expected = {}  # Code -> owner, from the owner tree
+    for folder, _, files in os.walk(names_dir):
+        for name in files:
+            if not name.endswith(".csv"):
+                continue
+            with open(os.path.join(folder, name), encoding="utf-8", newline="") as f:
+                for row in list(csv.reader(f, delimiter=";"))[1:]:
+                    expected[row[0]] = row[1]
+
+    labels = list(iter_labels(str(rooms_dir / "B1")))
+    items = [(code, owner) for code, owner, name in labels if code != owner]
+    assert items
+    assert all(owner and owner == expected[code] for code, owner in items)
@@ -0,0 +1,30 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from run import RoomEntries, load_data  # noqa: E402
+
+
+def write(path, text):
+    with open(path, mode="w", encoding="utf-8", newline="") as f:
+        f.write(text)
+    return str(path)
+
+
+def test_quote_inside_a_field_keeps_the_lazy_loader(tmp_path):
+    path = write(tmp_path / "room.csv", 'B2/1/1.148;Místnost: B2/1/1.148;\n000000001;;Monitor 24\\" 1\n')
+    room_name, entries = load_data(path, show_errors=False)
+    try:
+        assert isinstance(entries, RoomEntries)
+        assert room_name == "B2/1/1.148"
+        assert list(entries)[1] == ("000000001", "", 'Monitor 24\\" 1')
+    finally:
+        entries.close()
+
+
+def test_quoted_field_uses_the_csv_module(tmp_path):
+    path = write(tmp_path / "room.csv", 'B1/2/2.14;Místnost: B1/2/2.14;\n000000002;;"Stůl; pracovní"\n')
+    room_name, entries = load_data(path, show_errors=False)
+    assert not isinstance(entries, RoomEntries)
+    assert list(entries)[1] == ("000000002", "", "Stůl; pracovní")
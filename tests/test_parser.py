@@ -0,0 +1,161 @@
+import csv
+import os
+import sys
+from collections import defaultdict
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import parser as manko  # noqa: E402
+from synthetic import write_manko  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def read_tree(output_dir):
+    """{relative path: rows} of every group file under an output directory."""
+    tree = {}
+    for folder, _, files in os.walk(output_dir):
+        for name in files:
+            if name.endswith(".csv"):
+                path = os.path.join(folder, name)
+                with open(path, encoding="utf-8", newline="") as f:
+                    tree[os.path.relpath(path, output_dir)] = list(csv.reader(f, delimiter=";"))
+    return tree
+
+
+@pytest.fixture
+def low_file_limit():
+    """Lowers the open file limit well below one handle per group (and below the old pool size of 256)."""
+    if resource is None:
+        pytest.skip("needs the resource module")
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (min(200, hard), hard))
+    yield
+    resource.setrlimit(resource.RLIMIT_NOFILE, (soft, hard))
+
+
+def test_split_stays_within_the_open_file_limit(tmp_path, low_file_limit):
+    manko_path = str(tmp_path / "MANKO.csv")
+    write_manko(manko_path, rows=20000, owners=100, rooms=2000)
+    rooms_dir, names_dir = str(tmp_path / "rooms"), str(tmp_path / "names")
+    manko.process_and_save(manko_path, rooms_dir, names_dir, incremental=False)
+
+    names = read_tree(names_dir)
+    assert len(names) > 2 * manko.MAX_OPEN_FILES
+    assert sum(len(rows) - 1 for rows in read_tree(rooms_dir).values()) == 20000
+    assert sum(len(rows) - 1 for rows in names.values()) == 20000
+
+
+def write_rows(path, owners):
+    """Writes a small MANKO.csv from {owner: [(code, name, location)]}."""
+    header = "Inventární číslo;Název;Druh;Datum;Cena;Umístění\n"
+    with open(path, mode="w", encoding="utf-8", newline="") as f:
+        f.write(header)
+        for owner, items in owners.items():
+            f.write(f"Odpovědná ososba: {owner};;;;;\n{header};;;;;\n")
+            for code, name, location in items:
+                f.write(f"{code};{name};DHM;01.01.2020;100;{location}\n")
+
+
+def test_incremental_run_rewrites_only_changed_groups(tmp_path, capsys):
+    manko_path = str(tmp_path / "MANKO.csv")
+    rooms_dir, names_dir = str(tmp_path / "rooms"), str(tmp_path / "names")
+    write_rows(manko_path, {"Jan Novák": [
+        ("000000001", "Monitor", "B1 / 2 / 2.14"),
+        ("000000005", "Židle", "B1 / 2 / 2.14"),
+        ("000000002", "Stůl", "B1 / 2 / 2.15"),
+        ("000000003", "Skříň", "B3 / 7 / 7.01"),
+        ("000000004", "Lampa", "B2 / 1 / 1.01"),
+    ]})
+    manko.process_and_save(manko_path, rooms_dir, names_dir)
+    old_time = 1_000_000_000 * 10**9
+    for output_dir in (rooms_dir, names_dir):
+        for relative_path in read_tree(output_dir):
+            os.utime(os.path.join(output_dir, relative_path), ns=(old_time, old_time))
+
+    # 000000001 moves to 2.15 and 000000003 disappears together with room B3/7/7.01
+    write_rows(manko_path, {"Jan Novák": [
+        ("000000005", "Židle", "B1 / 2 / 2.14"),
+        ("000000001", "Monitor", "B1 / 2 / 2.15"),
+        ("000000002", "Stůl", "B1 / 2 / 2.15"),
+        ("000000004", "Lampa", "B2 / 1 / 1.01"),
+    ]})
+    capsys.readouterr()
+    manko.process_and_save(manko_path, rooms_dir, names_dir)
+    output = capsys.readouterr().out
+    assert f"{rooms_dir}: rewrote 2 of 3 files, removed 1." in output
+    assert f"{names_dir}: rewrote 2 of 3 files, removed 1." in output
+
+    rooms = read_tree(rooms_dir)
+    assert sorted(rooms) == [os.path.join("B1", "2", "2.14.csv"), os.path.join("B1", "2", "2.15.csv"), os.path.join("B2", "1", "1.01.csv")]
+    assert [row[0] for row in rooms[os.path.join("B1", "2", "2.14.csv")][1:]] == ["000000005"]
+    assert [row[0] for row in rooms[os.path.join("B1", "2", "2.15.csv")][1:]] == ["000000001", "000000002"]
+    assert not os.path.exists(os.path.join(rooms_dir, "B3"))
+    assert not os.path.exists(os.path.join(names_dir, "Jan Novák", "B3"))
+
+    for group_dir in (rooms_dir, os.path.join(names_dir, "Jan Novák")):
+        assert os.stat(os.path.join(group_dir, "B2", "1", "1.01.csv")).st_mtime_ns == old_time
+        assert os.stat(os.path.join(group_dir, "B1", "2", "2.15.csv")).st_mtime_ns != old_time
+        assert not [name for _, _, files in os.walk(group_dir) for name in files if name.endswith(".tmp")]
+
+
+LINE_BYTES = 80
+ROOMS = ("B1 / 2 / 2.14", "B1 / 2 / 2.15", "B3 / 7 / 7.01", "B2 / 1 / 1.01")
+
+
+def write_fixed_width(path, kinds, encoding):
+    """
+    Writes one line per entry of kinds ("header" or "item"), every line padded to
+    LINE_BYTES bytes, so the shard cuts of find_shard_ranges fall on known lines.
+    Padding goes at the end of the last column, which the parser strips.
+    """
+    with open(path, mode="wb") as f:
+        for number, kind in enumerate(kinds):
+            if number == 0:
+                line = "Inventární číslo;Název;Druh;Datum;Cena;Umístění"
+            elif kind == "header":
+                line = f"Odpovědná ososba: Jiří Dvořák {number};;;;;"
+            else:
+                line = f"{number:09d};Židle {number};DHM;01.01.2020;100;{ROOMS[number % len(ROOMS)]}"
+            data = line.encode(encoding)
+            f.write(data + b" " * (LINE_BYTES - 1 - len(data)) + b"\n")
+
+
+def grouped_items(file_path, jobs):
+    """Items of both outputs per group, in output order, plus the detected owners."""
+    rooms, names, owners = defaultdict(list), defaultdict(list), []
+    for main_key, sub_keys, code, name, in_rooms, owner in manko.iter_file_items(file_path, jobs, on_owner=owners.append):
+        if in_rooms:
+            rooms[(main_key, sub_keys)].append((code, name))
+        if owner is not None:
+            names[(owner, main_key, sub_keys)].append((code, name))
+    return dict(rooms), dict(names), owners
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "cp1250"])
+@pytest.mark.parametrize("jobs", [2, 3, 5])
+@pytest.mark.parametrize("offsets", [(0,), (-1,), (-2,), (-1, 0), (-2, 0), (0, 2), (-3, 0)])
+def test_parallel_split_matches_serial(tmp_path, encoding, jobs, offsets):
+    """Owner headers land on, right before and within two rows around every shard cut."""
+    lines = 301
+    file_path = str(tmp_path / "MANKO.csv")
+    size = lines * LINE_BYTES
+    cut_lines = [-(-(size * shard // jobs) // LINE_BYTES) for shard in range(1, jobs)]
+    kinds = ["item"] * lines
+    for number in range(1, lines, 41):
+        kinds[number] = "header"  # Owners all over the file, so every shard starts inside one
+    for cut_line in cut_lines:
+        for offset in offsets:
+            kinds[cut_line + offset] = "header"
+    write_fixed_width(file_path, kinds, encoding)
+
+    starts = [start for start, _ in manko.find_shard_ranges(file_path, jobs)][1:]
+    assert starts == [cut_line * LINE_BYTES for cut_line in cut_lines]
+    assert manko.detect_format(file_path) == (encoding, ";")
+    assert grouped_items(file_path, jobs) == grouped_items(file_path, 1)
@@ -0,0 +1,110 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from snapshot import HEADER, Snapshot, compile_snapshot, open_snapshot  # noqa: E402
+from synthetic import write_manko  # noqa: E402
+
+
+def open_handles(path):
+    """Number of file descriptors of this process pointing at path (Linux only)."""
+    fd_dir = "/proc/self/fd"
+    if not os.path.isdir(fd_dir):
+        pytest.skip("needs /proc/self/fd")
+    count = 0
+    for fd in os.listdir(fd_dir):
+        try:
+            count += os.path.realpath(os.readlink(os.path.join(fd_dir, fd))) == os.path.realpath(path)
+        except OSError:
+            continue
+    return count
+
+
+def maps_of(path):
+    with open("/proc/self/maps", encoding="utf-8") as f:
+        return sum(os.path.realpath(path) in line for line in f)
+
+
+@pytest.fixture
+def compiled(tmp_path):
+    csv_path = str(tmp_path / "MANKO.csv")
+    write_manko(csv_path, rows=500, owners=5, rooms=20)
+    return csv_path, compile_snapshot(csv_path)
+
+
+@pytest.mark.parametrize("length", [0, 10, HEADER.size + 5, "half", "minus_one"])
+def test_truncated_snapshot_is_closed(compiled, length):
+    csv_path, snapshot_path = compiled
+    size = os.path.getsize(snapshot_path)
+    length = {"half": size // 2, "minus_one": size - 1}.get(length, length)
+    with open(snapshot_path, "r+b") as f:
+        f.truncate(length)
+
+    with pytest.raises(ValueError):
+        Snapshot(snapshot_path)
+    assert open_handles(snapshot_path) == 0
+    assert maps_of(snapshot_path) == 0
+
+
+def test_open_snapshot_recompiles_truncated_file(compiled):
+    csv_path, snapshot_path = compiled
+    with open(snapshot_path, "rb") as f:
+        expected = f.read()
+    with open(snapshot_path, "r+b") as f:
+        f.truncate(len(expected) // 3)
+
+    snapshot = open_snapshot(csv_path, snapshot_path)
+    try:
+        assert snapshot.is_fresh(csv_path)
+        assert len(snapshot) > 0
+    finally:
+        snapshot.close()
+    with open(snapshot_path, "rb") as f:
+        assert f.read() == expected
+
+
+def test_find_folds_inventory_numbers(tmp_path):
+    csv_path = str(tmp_path / "MANKO.csv")
+    header = "Inventární číslo;Název;Druh;Datum;Cena;Umístění\n"
+    with open(csv_path, mode="w", encoding="utf-8", newline="") as f:
+        f.write(header)
+        f.write(f"Odpovědná ososba: Jan Novák;;;;;\n{header};;;;;\n")
+        f.write("000000001;Monitor;DHM;01.01.2020;100;B1 / 2 / 2.14\n")
+        f.write("Č-000000002;Židle;DHM;01.01.2020;100;B1 / 2 / 2.15\n")
+        f.write("000000003;Stůl;DHM;01.01.2020;100;B1 / 2 / 2.15\n")
+    snapshot = Snapshot(compile_snapshot(csv_path))
+    try:
+        assert snapshot.find(" C-000000002") == ("B1/2/2.15", 1)
+        assert snapshot.find("Č-000000002") == ("B1/2/2.15", 1)
+        room_path, index = snapshot.find("000000003")
+        entries = snapshot.room_entries(room_path)
+        assert entries[index][0] == "000000003"
+        assert snapshot.find("000000004") is None
+    finally:
+        snapshot.close()
+
+
+def test_is_fresh_stores_the_new_mtime_after_a_hash_match(compiled, monkeypatch):
+    csv_path, snapshot_path = compiled
+    stat = os.stat(csv_path)
+    os.utime(csv_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    snapshot = Snapshot(snapshot_path)
+    try:
+        assert snapshot.is_fresh(csv_path)
+    finally:
+        snapshot.close()
+
+    def no_hash(path):
+        raise AssertionError("hashed again")
+
+    monkeypatch.setattr("snapshot.file_sha256", no_hash)
+    snapshot = Snapshot(snapshot_path)
+    try:
+        assert snapshot.source_mtime_ns == stat.st_mtime_ns + 10**9
+        assert snapshot.is_fresh(csv_path)
+    finally:
+        snapshot.close()
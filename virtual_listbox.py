@@ -0,0 +1,131 @@
+import tkinter as tk
+from tkinter import ttk
+from tkinter import font as tkfont
+
+
+class VirtualListbox:
+    """
+    Listbox that only materializes the rows that fit on screen.
+
+    The full item sequence stays in Python; the Tk Listbox holds just the visible
+    window starting at self.top and is redrawn on scrolling. Selection is tracked
+    as an absolute index, so moving, paging and jumping cost the same however many
+    items there are.
+    """
+
+    def __init__(self, master, **listbox_options):
+        self.frame = ttk.Frame(master)
+        self.listbox = tk.Listbox(self.frame, exportselection=False, **listbox_options)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = ttk.Scrollbar(self.frame, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        self.items = []
+        self.top = 0  # Index of the first visible item
+        self.selected = None  # Absolute index of the selected item
+        self.rows = 1  # Number of rows that fit into the Listbox
+
+        self.listbox.bind("<Configure>", self.on_configure)
+        self.listbox.bind("<<ListboxSelect>>", self.on_select)
+        self.listbox.bind("<MouseWheel>", self.on_wheel)
+        self.listbox.bind("<Button-4>", self.on_wheel)
+        self.listbox.bind("<Button-5>", self.on_wheel)
+        self.listbox.bind("<Prior>", lambda event: self.move(-self.rows))
+        self.listbox.bind("<Next>", lambda event: self.move(self.rows))
+        self.listbox.bind("<Home>", lambda event: self.move(-len(self.items)))
+        self.listbox.bind("<End>", lambda event: self.move(len(self.items)))
+
+    def pack(self, **options):
+        self.frame.pack(**options)
+
+    def bind(self, sequence, func):
+        self.listbox.bind(sequence, func)
+
+    def focus_set(self):
+        self.listbox.focus_set()
+
+    def size(self):
+        return len(self.items)
+
+    def set_items(self, items, selected=0):
+        """
+        Replace the items (any sequence) and select one of them; only the visible rows are drawn.
+        """
+        self.items = items
+        self.top = 0
+        self.selected = selected if items else None
+        if self.selected is not None:
+            self.scroll_to(self.selected)
+        self.render()
+
+    def move(self, step):
+        """
+        Move the selection by step items, keeping it on screen.
+        """
+        if not self.items:
+            return "break"
+        current = 0 if self.selected is None else self.selected
+        self.select(max(0, min(current + step, len(self.items) - 1)))
+        return "break"  # Prevent default Listbox behavior
+
+    def select(self, index):
+        self.selected = index
+        self.scroll_to(index)
+        self.render()
+
+    def scroll_to(self, index):
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.rows:
+            self.top = index - self.rows + 1
+
+    def yview(self, *args):
+        """
+        Scrollbar command: "moveto fraction" or "scroll n units|pages".
+        """
+        if args[0] == "moveto":
+            top = int(float(args[1]) * len(self.items))
+        elif args[2] == "pages":
+            top = self.top + int(args[1]) * self.rows
+        else:
+            top = self.top + int(args[1])
+        self.top = max(0, min(top, len(self.items) - self.rows))
+        self.render()
+
+    def on_wheel(self, event):
+        if event.num == 4 or event.delta > 0:
+            self.yview("scroll", -3, "units")
+        else:
+            self.yview("scroll", 3, "units")
+        return "break"
+
+    def on_select(self, event):
+        selection = self.listbox.curselection()
+        if selection:
+            self.selected = self.top + selection[0]
+
+    def on_configure(self, event):
+        # Tk's Listbox line height is the font line space plus one pixel and the selection border
+        line_height = tkfont.Font(font=self.listbox.cget("font")).metrics("linespace") + 1 + 2 * int(self.listbox.cget("selectborderwidth"))
+        inner_height = event.height - 2 * (int(self.listbox.cget("borderwidth")) + int(self.listbox.cget("highlightthickness")))
+        rows = max(1, inner_height // line_height)
+        if rows != self.rows:
+            self.rows = rows
+            self.top = max(0, min(self.top, len(self.items) - self.rows))
+            if self.selected is not None:
+                self.scroll_to(self.selected)
+            self.render()
+
+    def render(self):
+        visible = self.items[self.top:self.top + self.rows]
+        self.listbox.delete(0, tk.END)
+        if len(visible):
+            self.listbox.insert(0, *visible)
+        if self.selected is not None and self.top <= self.selected < self.top + self.rows:
+            self.listbox.selection_set(self.selected - self.top)
+            self.listbox.activate(self.selected - self.top)
+
+        if self.items:
+            self.scrollbar.set(self.top / len(self.items), min(1.0, (self.top + self.rows) / len(self.items)))
+        else:
+            self.scrollbar.set(0.0, 1.0)